@@ -1,34 +1,53 @@
+from .mesh_cache import *
+from .mesh_topology import *
 from .collapse_checker import *
 from .dissolve_checker import *
 from .id_color import *
 from .shape_key_manager import *
 from .origin_edit import *
+from .lp_hp_matching import *
 from .renamer_lowpoly import *
 from .swap_names import *
+from .face_sets import *
 from .select_faceset import *
+from .attribute_visibility import *
+from .attribute_transfer import *
 from .attributes_manager import *
+from .face_set_tools import *
 from .bevel_modifier import *
 
 def register():
+    mesh_cache_register()
+    mesh_topology_register()
     collapse_checker_register()
     dissolve_checker_register()
     id_color_register()
     shape_key_manager_register()
     origin_edit_register()
+    lp_hp_matching_register()
     renamer_lowpoly_register()
     swap_names_register()
+    face_sets_register()
     select_faceset_register()
+    attribute_transfer_register()
     attributes_manager_register()
+    face_set_tools_register()
     bevel_modifier_register()
 
 def unregister():
     bevel_modifier_unregister()
+    face_set_tools_unregister()
     attributes_manager_unregister()
+    attribute_transfer_unregister()
     select_faceset_unregister()
+    face_sets_unregister()
     swap_names_unregister()
     renamer_lowpoly_unregister()
+    lp_hp_matching_unregister()
     origin_edit_unregister()
     shape_key_manager_unregister()
     id_color_unregister()
     dissolve_checker_unregister()
     collapse_checker_unregister()
+    mesh_topology_unregister()
+    mesh_cache_unregister()
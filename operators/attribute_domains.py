@@ -0,0 +1,219 @@
+import numpy as np
+from .mesh_cache import touch_attributes
+from .mesh_topology import get_topology
+
+
+# Tipi supportati: data_type -> (proprietà per foreach_get/set, dtype, componenti).
+# BYTE_COLOR viene letto e scritto come colore float, Blender lo converte.
+ATTRIBUTE_LAYOUTS = {
+    'BOOLEAN': ("value", bool, 1),
+    'FLOAT': ("value", np.float32, 1),
+    'INT': ("value", np.int32, 1),
+    'INT8': ("value", np.int8, 1),
+    'INT32_2D': ("value", np.int32, 2),
+    'FLOAT2': ("vector", np.float32, 2),
+    'FLOAT_VECTOR': ("vector", np.float32, 3),
+    'FLOAT_COLOR': ("color", np.float32, 4),
+    'BYTE_COLOR': ("color", np.float32, 4),
+    'QUATERNION': ("value", np.float32, 4),
+}
+
+# Modi di riduzione per gli elementi che ricevono più valori
+REDUCTION_ITEMS = [
+    ('MEAN', "Average", "Average of the linked values"),
+    ('MIN', "Minimum", "Smallest linked value"),
+    ('MAX', "Maximum", "Largest linked value"),
+    ('ANY', "Any", "Set if at least one linked value is set"),
+    ('ALL', "All", "Set only if every linked value is set"),
+    ('AREA', "Area Weighted", "Average weighted by the surface area of the linked elements"),
+]
+
+
+def domain_size(mesh, domain):
+    """Numero di elementi di un dominio della mesh"""
+    if domain == 'POINT':
+        return len(mesh.vertices)
+    if domain == 'EDGE':
+        return len(mesh.edges)
+    if domain == 'FACE':
+        return len(mesh.polygons)
+    return len(mesh.loops)
+
+def read_attribute(attr):
+    """Valori dell'attributo come array (elementi, componenti)"""
+    prop, dtype, size = ATTRIBUTE_LAYOUTS[attr.data_type]
+    values = np.empty(len(attr.data) * size, dtype=dtype)
+    attr.data.foreach_get(prop, values)
+    return values.reshape(-1, size)
+
+def write_attribute(attr, values):
+    """Scrive tutti i valori dell'attributo con un solo foreach_set
+    (e invalida le cache che dipendono dagli attributi della mesh)"""
+    prop, dtype, _size = ATTRIBUTE_LAYOUTS[attr.data_type]
+    attr.data.foreach_set(prop, np.ascontiguousarray(values, dtype=dtype).ravel())
+    touch_attributes(attr.id_data)
+
+
+# =============================================================================
+# TOPOLOGIA
+# =============================================================================
+
+def domain_pairs(mesh, src_domain, dst_domain):
+    """Coppie di incidenza (dst, src) tra gli elementi di due domini diversi.
+
+    Ogni elemento di destinazione riceve i valori di tutti gli elementi
+    sorgente a cui è collegato (vertici di una faccia, facce di un vertice...).
+    Un corner è collegato al suo vertice, alla sua faccia e ai due edge
+    della faccia che si incontrano nel corner.
+    """
+    key = (src_domain, dst_domain)
+    topology = get_topology(mesh)
+
+    if 'EDGE' in key and 'POINT' in key:
+        points = topology.edge_verts.ravel()
+        edges = np.repeat(np.arange(topology.edge_count, dtype=np.int32), 2)
+        return (points, edges) if dst_domain == 'POINT' else (edges, points)
+
+    if 'CORNER' in key:
+        corners = np.arange(topology.corner_count, dtype=np.int32)
+        other_domain = dst_domain if src_domain == 'CORNER' else src_domain
+        if other_domain == 'POINT':
+            other = topology.corner_vert
+        elif other_domain == 'FACE':
+            other = topology.corner_face
+        else:
+            previous_edge = topology.corner_edge[topology.previous_corner]
+            corners = np.concatenate((corners, corners))
+            other = np.concatenate((topology.corner_edge, previous_edge))
+        return (corners, other) if dst_domain == 'CORNER' else (other, corners)
+
+    if 'FACE' in key and 'POINT' in key:
+        other = topology.corner_vert
+    else:
+        other = topology.corner_edge
+    return (topology.corner_face, other) if dst_domain == 'FACE' else (other, topology.corner_face)
+
+def element_areas(mesh, domain):
+    """Area di superficie di ogni elemento del dominio.
+
+    Le facce usano la propria area; ogni corner riceve una quota uguale
+    dell'area della sua faccia e vertici ed edge sommano le quote dei
+    corner collegati. Gli elementi isolati hanno area zero.
+    """
+    face_areas = np.empty(len(mesh.polygons), dtype=np.float64)
+    mesh.polygons.foreach_get("area", face_areas)
+    if domain == 'FACE':
+        return face_areas
+
+    topology = get_topology(mesh)
+    shares = (face_areas / np.maximum(topology.loop_totals, 1))[topology.corner_face]
+
+    if domain == 'CORNER':
+        return shares
+    if domain == 'POINT':
+        return np.bincount(topology.corner_vert, weights=shares, minlength=topology.vertex_count)
+    return np.bincount(topology.corner_edge, weights=shares, minlength=topology.edge_count)
+
+
+# =============================================================================
+# RIDUZIONE
+# =============================================================================
+
+def _weighted_mean(gathered, dst_idx, dst_count, weights):
+    totals = np.bincount(dst_idx, weights=weights, minlength=dst_count)
+    sums = np.empty((dst_count, gathered.shape[1]), dtype=np.float64)
+    for k in range(gathered.shape[1]):
+        sums[:, k] = np.bincount(dst_idx, weights=gathered[:, k] * weights, minlength=dst_count)
+
+    result = np.zeros_like(sums)
+    np.divide(sums, totals[:, None], out=result, where=totals[:, None] > 0)
+    return result, totals
+
+def _cast_result(result, values):
+    # Riporta il risultato float64 al tipo dell'attributo
+    if values.dtype == bool:
+        return result >= 0.5
+    if np.issubdtype(values.dtype, np.integer):
+        info = np.iinfo(values.dtype)
+        return np.clip(np.rint(result), info.min, info.max).astype(values.dtype)
+    return result.astype(values.dtype)
+
+def reduce_pairs(values, dst_idx, src_idx, dst_count, mode='MAX', weights=None):
+    """Porta i valori (elementi, componenti) sugli elementi di destinazione.
+
+    mode è uno dei REDUCTION_ITEMS; ogni componente è ridotta separatamente.
+    ANY e ALL considerano impostato ogni valore diverso da zero e scrivono
+    1/0 (True/False per i booleani). AREA richiede weights, l'area di ogni
+    elemento sorgente. Le destinazioni senza elementi collegati restano a zero.
+    """
+    gathered = values[src_idx]
+    shape = (dst_count, values.shape[1])
+    linked = np.bincount(dst_idx, minlength=dst_count) > 0
+
+    if values.dtype == bool and mode in ('MIN', 'MAX'):
+        mode = 'ALL' if mode == 'MIN' else 'ANY'
+
+    if mode in ('ANY', 'ALL'):
+        is_set = gathered != 0
+        if mode == 'ANY':
+            result = np.zeros(shape, dtype=bool)
+            np.logical_or.at(result, dst_idx, is_set)
+        else:
+            result = np.ones(shape, dtype=bool)
+            np.logical_and.at(result, dst_idx, is_set)
+            result[~linked] = False
+        return result.astype(values.dtype)
+
+    if mode in ('MEAN', 'AREA'):
+        gathered = gathered.astype(np.float64)
+        ones = np.ones(len(dst_idx))
+        if mode == 'AREA':
+            result, totals = _weighted_mean(gathered, dst_idx, dst_count, weights[src_idx])
+            # Elementi collegati solo a geometria senza area: media semplice
+            flat = linked & (totals <= 0)
+            if flat.any():
+                result[flat] = _weighted_mean(gathered, dst_idx, dst_count, ones)[0][flat]
+        else:
+            result = _weighted_mean(gathered, dst_idx, dst_count, ones)[0]
+        return _cast_result(result, values)
+
+    if np.issubdtype(values.dtype, np.integer):
+        info = np.iinfo(values.dtype)
+        initial = info.min if mode == 'MAX' else info.max
+    else:
+        initial = -np.inf if mode == 'MAX' else np.inf
+    result = np.full(shape, initial, dtype=values.dtype)
+    ufunc = np.maximum if mode == 'MAX' else np.minimum
+    ufunc.at(result, dst_idx, gathered)
+
+    result[~linked] = 0
+    return result
+
+
+def convert_attribute_domain(mesh, name, domain, mode='MAX'):
+    """Converte l'attributo name della mesh nel dominio indicato.
+
+    mode sceglie come combinare i valori che finiscono sullo stesso elemento.
+    La mesh deve essere in Object Mode. Restituisce il nuovo attributo.
+    """
+    attr = mesh.attributes[name]
+    data_type = attr.data_type
+    src_domain = attr.domain
+    values = read_attribute(attr)
+    dst_idx, src_idx = domain_pairs(mesh, src_domain, domain)
+    weights = element_areas(mesh, src_domain) if mode == 'AREA' else None
+    new_values = reduce_pairs(values, dst_idx, src_idx, domain_size(mesh, domain), mode, weights)
+
+    if data_type == 'QUATERNION' and mode in ('MEAN', 'AREA'):
+        # La media di rotazioni va rinormalizzata
+        lengths = np.linalg.norm(new_values, axis=1, keepdims=True)
+        np.divide(new_values, lengths, out=new_values, where=lengths > 0)
+
+    # Il riferimento ad attr non è più valido dopo new(): si usa il nome
+    temp_name = mesh.attributes.new(name=name + "_temp", type=data_type, domain=domain).name
+    write_attribute(mesh.attributes[temp_name], new_values)
+
+    mesh.attributes.remove(mesh.attributes[name])
+    new_attr = mesh.attributes[temp_name]
+    new_attr.name = name
+    return new_attr
@@ -0,0 +1,422 @@
+import ast
+import numpy as np
+from collections import OrderedDict
+from .attribute_domains import (
+    ATTRIBUTE_LAYOUTS, domain_pairs, domain_size, element_areas, read_attribute, reduce_pairs, write_attribute,
+)
+from .attribute_selection import read_selection
+from .mesh_cache import get_cached
+
+
+# Espressioni compilate tenute in cache (testo -> CompiledExpression)
+MAX_COMPILED_EXPRESSIONS = 64
+
+_compiled_cache = OrderedDict()
+
+# Valori calcolati dal motore e non letti da un attributo
+BUILTINS = ('position', 'normal', 'area', 'selection', 'index')
+
+_COMPONENTS = {
+    'x': 0, 'y': 1, 'z': 2, 'w': 3,
+    'r': 0, 'g': 1, 'b': 2, 'a': 3,
+}
+
+
+def _as_column(a, b):
+    # Uno scalare per elemento (N,) diventa (N, 1) accanto a un vettore (N, k)
+    a, b = np.asarray(a), np.asarray(b)
+    if a.ndim == 1 and b.ndim == 2:
+        a = a[:, None]
+    elif b.ndim == 1 and a.ndim == 2:
+        b = b[:, None]
+    return a, b
+
+def _float(a):
+    a = np.asarray(a)
+    return a.astype(np.float64) if a.dtype == bool else a
+
+def _length(v):
+    v = _float(v)
+    return np.linalg.norm(v, axis=-1) if v.ndim == 2 else np.abs(v)
+
+def _normalize(v):
+    v = _float(v)
+    lengths = np.linalg.norm(v, axis=-1, keepdims=True)
+    return np.divide(v, lengths, out=np.zeros_like(v, dtype=np.float64), where=lengths > 0)
+
+def _dot(a, b):
+    return np.sum(_float(a) * _float(b), axis=-1)
+
+def _vec(*components):
+    return np.stack(np.broadcast_arrays(*[_float(c) for c in components]), axis=-1)
+
+def _mix(a, b, factor):
+    a, b = _as_column(_float(a), _float(b))
+    a, factor = _as_column(a, _float(factor))
+    return a + (b - a) * factor
+
+def _clamp(x, low=0.0, high=1.0):
+    return np.clip(_float(x), low, high)
+
+def _remap(x, from_min, from_max, to_min=0.0, to_max=1.0):
+    span = np.asarray(from_max - from_min, dtype=np.float64)
+    valid = span != 0
+    t = np.where(valid, (_float(x) - from_min) / np.where(valid, span, 1.0), 0.0)
+    return to_min + (to_max - to_min) * t
+
+def _smoothstep(edge0, edge1, x):
+    t = np.clip(_remap(x, edge0, edge1), 0.0, 1.0)
+    return t * t * (3.0 - 2.0 * t)
+
+def _curve(x, *points):
+    # Curva lineare a tratti: curve(x, x0, y0, x1, y1, ...)
+    if len(points) < 4 or len(points) % 2:
+        raise ValueError("curve() needs at least two (x, y) points")
+    xs = np.asarray(points[0::2], dtype=np.float64)
+    ys = np.asarray(points[1::2], dtype=np.float64)
+    order = np.argsort(xs, kind='stable')
+    return np.interp(_float(x), xs[order], ys[order])
+
+def _where(condition, a, b):
+    condition = np.asarray(condition)
+    a, b = _as_column(a, b)
+    if condition.ndim == 1 and (np.ndim(a) == 2 or np.ndim(b) == 2):
+        condition = condition[:, None]
+    return np.where(condition, a, b)
+
+FUNCTIONS = {
+    'abs': np.abs,
+    'sqrt': lambda x: np.sqrt(np.maximum(_float(x), 0.0)),
+    'exp': np.exp,
+    'log': lambda x: np.log(np.maximum(_float(x), 1e-30)),
+    'sin': np.sin,
+    'cos': np.cos,
+    'floor': np.floor,
+    'ceil': np.ceil,
+    'round': np.rint,
+    'min': np.minimum,
+    'max': np.maximum,
+    'clamp': _clamp,
+    'mix': _mix,
+    'remap': _remap,
+    'smoothstep': _smoothstep,
+    'curve': _curve,
+    'where': _where,
+    'length': _length,
+    'normalize': _normalize,
+    'dot': _dot,
+    'vec': _vec,
+}
+
+_BINARY_OPERATORS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: lambda a, b: np.divide(_float(a), b),
+    ast.Mod: np.mod,
+    ast.Pow: lambda a, b: np.power(_float(a), b),
+}
+
+_COMPARE_OPERATORS = {
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+
+
+# =============================================================================
+# COMPILAZIONE
+# =============================================================================
+
+class CompiledExpression:
+    """Espressione tradotta in una funzione NumPy.
+
+    names: attributi e built-in usati, nell'ordine in cui compaiono.
+    evaluate(fetch) chiama fetch(nome) una volta per nome e restituisce
+    l'array risultato.
+    """
+
+    def __init__(self, text, function, names):
+        self.text = text
+        self.function = function
+        self.names = names
+
+    def evaluate(self, fetch):
+        arrays = {name: fetch(name) for name in self.names}
+        return self.function(arrays)
+
+
+def _compile_node(node, names):
+    """Funzione arrays -> valore per il nodo dell'AST (solo costrutti ammessi)"""
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool):
+            value = node.value
+        elif isinstance(node.value, (int, float)):
+            value = float(node.value)
+        else:
+            raise ValueError(f"Unsupported constant: {node.value!r}")
+        return lambda arrays: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name == 'pi':
+            return lambda arrays: np.pi
+        if name not in names:
+            names.append(name)
+        return lambda arrays: arrays[name]
+
+    if isinstance(node, ast.Attribute):
+        # Componente: position.z, Color.r, normal.length
+        inner = _compile_node(node.value, names)
+        if node.attr == 'length':
+            return lambda arrays: _length(inner(arrays))
+        if node.attr not in _COMPONENTS:
+            raise ValueError(f"Unknown component: .{node.attr}")
+        index = _COMPONENTS[node.attr]
+
+        def component(arrays):
+            value = np.asarray(inner(arrays))
+            if value.ndim != 2 or index >= value.shape[1]:
+                raise ValueError(f"Component .{node.attr} not available")
+            return value[:, index]
+        return component
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.keywords:
+            raise ValueError("Only plain function calls are supported")
+        func_name = node.func.id
+        if func_name == 'attr':
+            # attr("Nome con spazi") per gli attributi con nomi non validi
+            if len(node.args) != 1 or not isinstance(node.args[0], ast.Constant) or not isinstance(node.args[0].value, str):
+                raise ValueError('attr() takes one quoted attribute name')
+            name = node.args[0].value
+            if name not in names:
+                names.append(name)
+            return lambda arrays: arrays[name]
+        if func_name not in FUNCTIONS:
+            raise ValueError(f"Unknown function: {func_name}()")
+        function = FUNCTIONS[func_name]
+        args = [_compile_node(arg, names) for arg in node.args]
+        return lambda arrays: function(*[arg(arrays) for arg in args])
+
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile_node(node.operand, names)
+        if isinstance(node.op, ast.USub):
+            return lambda arrays: np.negative(_float(operand(arrays)))
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        if isinstance(node.op, ast.Not):
+            return lambda arrays: np.logical_not(operand(arrays))
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        op = _BINARY_OPERATORS[type(node.op)]
+        left = _compile_node(node.left, names)
+        right = _compile_node(node.right, names)
+        return lambda arrays: op(*_as_column(_float(left(arrays)), _float(right(arrays))))
+
+    if isinstance(node, ast.BoolOp):
+        op = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        values = [_compile_node(value, names) for value in node.values]
+
+        def bool_op(arrays):
+            result = values[0](arrays)
+            for value in values[1:]:
+                result = op(*_as_column(result, value(arrays)))
+            return result
+        return bool_op
+
+    if isinstance(node, ast.Compare):
+        operands = [_compile_node(node.left, names)] + [_compile_node(c, names) for c in node.comparators]
+        ops = []
+        for op in node.ops:
+            if type(op) not in _COMPARE_OPERATORS:
+                raise ValueError("Unsupported comparison")
+            ops.append(_COMPARE_OPERATORS[type(op)])
+
+        def compare(arrays):
+            # a < b < c diventa (a < b) and (b < c)
+            values = [operand(arrays) for operand in operands]
+            result = True
+            for op, a, b in zip(ops, values, values[1:]):
+                result = np.logical_and(result, op(*_as_column(a, b)))
+            return result
+        return compare
+
+    if isinstance(node, ast.IfExp):
+        condition = _compile_node(node.test, names)
+        body = _compile_node(node.body, names)
+        orelse = _compile_node(node.orelse, names)
+        return lambda arrays: _where(condition(arrays), body(arrays), orelse(arrays))
+
+    raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+
+def compile_expression(text):
+    """Compila l'espressione (con cache). Solleva ValueError se non è valida.
+
+    La sintassi è quella delle espressioni Python: operatori aritmetici,
+    confronti, and/or/not, 'a if condizione else b', componenti (.x .y .z
+    .w, .r .g .b .a, .length) e le funzioni di FUNCTIONS. I nomi sono
+    attributi della mesh o BUILTINS; attr("nome") accetta qualsiasi nome.
+    """
+    compiled = _compiled_cache.get(text)
+    if compiled is not None:
+        _compiled_cache.move_to_end(text)
+        return compiled
+
+    try:
+        tree = ast.parse(text.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Syntax error: {e.msg}") from None
+
+    names = []
+    function = _compile_node(tree.body, names)
+    compiled = CompiledExpression(text, function, tuple(names))
+
+    _compiled_cache[text] = compiled
+    while len(_compiled_cache) > MAX_COMPILED_EXPRESSIONS:
+        _compiled_cache.popitem(last=False)
+    return compiled
+
+
+# =============================================================================
+# SORGENTI
+# =============================================================================
+
+def _to_domain(mesh, values, src_domain, domain):
+    if src_domain == domain:
+        return values
+    dst_idx, src_idx = domain_pairs(mesh, src_domain, domain)
+    return reduce_pairs(values, dst_idx, src_idx, domain_size(mesh, domain), 'MEAN')
+
+def _read_builtin(mesh, name, domain):
+    if name == 'index':
+        return np.arange(domain_size(mesh, domain), dtype=np.int32)
+    if name == 'selection':
+        return read_selection(mesh, domain)
+    if name == 'area':
+        return element_areas(mesh, domain)
+
+    if name == 'position':
+        values = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", values)
+        return _to_domain(mesh, values.reshape(-1, 3), 'POINT', domain)
+
+    # normal: normali delle facce, dei corner o dei vertici
+    if domain == 'FACE':
+        collection, src_domain = mesh.polygon_normals, 'FACE'
+    elif domain == 'CORNER':
+        collection, src_domain = mesh.corner_normals, 'CORNER'
+    else:
+        collection, src_domain = mesh.vertex_normals, 'POINT'
+    values = np.empty(len(collection) * 3, dtype=np.float32)
+    collection.foreach_get("vector", values)
+    values = _to_domain(mesh, values.reshape(-1, 3), src_domain, domain)
+    return _normalize(values) if src_domain != domain else values
+
+def _read_source(mesh, name, domain):
+    if name in mesh.attributes:
+        attr = mesh.attributes[name]
+        if attr.data_type not in ATTRIBUTE_LAYOUTS:
+            raise ValueError(f"Attribute '{name}' has unsupported type {attr.data_type}")
+        values = _to_domain(mesh, read_attribute(attr), attr.domain, domain)
+    elif name in BUILTINS:
+        values = _read_builtin(mesh, name, domain)
+    else:
+        raise ValueError(f"Unknown attribute: '{name}'")
+
+    # Gli attributi a una componente diventano array 1D
+    if values.ndim == 2 and values.shape[1] == 1:
+        values = values[:, 0]
+    values.flags.writeable = False
+    return values
+
+def source_array(mesh, name, domain):
+    """Valori dell'attributo o del built-in name nel dominio indicato.
+
+    Gli array estratti restano nella cache della mesh finché non cambiano
+    la geometria o i valori degli attributi (touch_attributes); gli
+    attributi con lo stesso nome di un built-in hanno la precedenza. La
+    selezione cambia senza modificare la geometria e viene sempre riletta.
+    La mesh deve essere in Object Mode.
+    """
+    is_attribute = name in mesh.attributes
+    if not is_attribute and name not in BUILTINS:
+        # Attributo rimosso o rinominato: un valore in cache non vale più
+        raise ValueError(f"Unknown attribute: '{name}'")
+    if name == 'selection' and not is_attribute:
+        return _read_source(mesh, name, domain)
+    return get_cached(mesh, ("expression_source", name, domain),
+                      lambda m: _read_source(m, name, domain), attributes=True)
+
+def evaluate_expression(mesh, text, domain):
+    """Valuta l'espressione sulla mesh: array (elementi,) o (elementi, componenti)"""
+    compiled = compile_expression(text)
+    count = domain_size(mesh, domain)
+    result = np.asarray(compiled.evaluate(lambda name: source_array(mesh, name, domain)))
+
+    # Le espressioni costanti valgono per tutti gli elementi
+    if result.ndim == 0:
+        result = np.full(count, result)
+    if result.shape[0] != count or result.ndim > 2:
+        raise ValueError("Expression does not produce one value per element")
+    return result
+
+
+# =============================================================================
+# SCRITTURA
+# =============================================================================
+
+# Tipo del nuovo attributo in base al numero di componenti del risultato
+_RESULT_TYPES = {1: 'FLOAT', 2: 'FLOAT2', 3: 'FLOAT_VECTOR', 4: 'FLOAT_COLOR'}
+
+def result_data_type(result):
+    """Tipo di attributo adatto a contenere il risultato di un'espressione"""
+    if result.dtype == bool:
+        return 'BOOLEAN' if result.ndim == 1 else _RESULT_TYPES[result.shape[1]]
+    size = 1 if result.ndim == 1 else result.shape[1]
+    if size not in _RESULT_TYPES:
+        raise ValueError(f"Expression produces {size} components")
+    return _RESULT_TYPES[size]
+
+def store_result(mesh, name, domain, result, data_type='AUTO'):
+    """Scrive il risultato nell'attributo name, creandolo se non esiste.
+
+    Un attributo esistente deve essere nello stesso dominio; un risultato
+    scalare riempie tutte le sue componenti, un vettore le prime (le altre
+    restano invariate). Restituisce l'attributo scritto.
+    """
+    attr = mesh.attributes.get(name)
+    if attr is None:
+        if data_type == 'AUTO':
+            data_type = result_data_type(result)
+        name = mesh.attributes.new(name=name, type=data_type, domain=domain).name
+        attr = mesh.attributes[name]
+    elif attr.domain != domain:
+        raise ValueError(f"Attribute '{name}' is on the {attr.domain} domain, not {domain}")
+    if attr.data_type not in ATTRIBUTE_LAYOUTS:
+        raise ValueError(f"Attribute '{name}' has unsupported type {attr.data_type}")
+
+    values = read_attribute(attr)
+    if result.dtype != bool:
+        result = np.nan_to_num(result.astype(np.float64), posinf=0.0, neginf=0.0)
+    if result.ndim == 1:
+        result = result[:, None]
+    if result.shape[1] > 1 and values.shape[1] == 1:
+        raise ValueError(f"Expression produces a vector, '{name}' holds single values")
+    if result.shape[1] == 1:
+        # Un risultato scalare riempie tutte le componenti
+        result = np.repeat(result, values.shape[1], axis=1)
+    size = min(result.shape[1], values.shape[1])
+
+    if values.dtype == bool:
+        values[:, :size] = result[:, :size] != 0
+    elif np.issubdtype(values.dtype, np.integer):
+        info = np.iinfo(values.dtype)
+        values[:, :size] = np.clip(np.rint(result[:, :size]), info.min, info.max)
+    else:
+        values[:, :size] = result[:, :size]
+    write_attribute(attr, values)
+    return attr
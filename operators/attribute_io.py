@@ -0,0 +1,185 @@
+import json
+import os
+import numpy as np
+from .attribute_domains import ATTRIBUTE_LAYOUTS, domain_size, read_attribute, write_attribute
+from .mesh_topology import topology_fingerprint
+
+
+# Versione del formato del manifest
+FORMAT_VERSION = 1
+
+# Nome dell'array con il manifest dentro i file .npz
+MANIFEST_KEY = "__manifest__"
+
+
+def _clean_file_part(text):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in text)
+
+
+# =============================================================================
+# EXPORT
+# =============================================================================
+
+def collect_attributes(mesh, names):
+    """Voci del manifest e array (elementi, componenti) degli attributi names.
+
+    Gli attributi mancanti o di tipo non supportato vengono saltati.
+    Restituisce (voce della mesh, lista di array nello stesso ordine).
+    """
+    entry = {
+        "mesh": mesh.name,
+        "fingerprint": list(topology_fingerprint(mesh)),
+        "attributes": [],
+    }
+    arrays = []
+    for name in names:
+        attr = mesh.attributes.get(name)
+        if attr is None or attr.data_type not in ATTRIBUTE_LAYOUTS:
+            continue
+        entry["attributes"].append({
+            "name": attr.name,
+            "domain": attr.domain,
+            "data_type": attr.data_type,
+        })
+        arrays.append(read_attribute(attr))
+    return entry, arrays
+
+def export_attributes(filepath, targets):
+    """Scrive gli attributi in un .npz (un solo file) o in una cartella di .npy.
+
+    targets: lista di (nome oggetto, mesh, nomi degli attributi).
+    Con estensione .npz il manifest è salvato nell'archivio (non compresso);
+    con .json il manifest è quel file e ogni attributo è un .npy accanto,
+    leggibile in memory-map all'import. Restituisce il numero di attributi scritti.
+    """
+    as_npz = filepath.lower().endswith(".npz")
+    manifest = {"version": FORMAT_VERSION, "meshes": []}
+    npz_arrays = {}
+    count = 0
+
+    for i, (object_name, mesh, names) in enumerate(targets):
+        entry, arrays = collect_attributes(mesh, names)
+        if not arrays:
+            continue
+        entry["object"] = object_name
+
+        for j, (attr_entry, values) in enumerate(zip(entry["attributes"], arrays)):
+            key = f"{i:03d}_{_clean_file_part(object_name)}_{j:03d}_{_clean_file_part(attr_entry['name'])}"
+            if as_npz:
+                npz_arrays[key] = values
+            else:
+                key = f"{os.path.splitext(os.path.basename(filepath))[0]}.{key}.npy"
+                np.save(os.path.join(os.path.dirname(filepath), key), values)
+            attr_entry["key"] = key
+            count += 1
+        manifest["meshes"].append(entry)
+
+    if as_npz:
+        np.savez(filepath, **npz_arrays, **{MANIFEST_KEY: np.array(json.dumps(manifest))})
+    else:
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+    return count
+
+
+# =============================================================================
+# IMPORT
+# =============================================================================
+
+class AttributeArchive:
+    """File esportato aperto in lettura.
+
+    Gli array dei .npy vengono aperti con numpy.load(mmap_mode='r'): i dati
+    restano su disco finché foreach_set non li legge. Gli archivi .npz
+    vengono letti un attributo alla volta.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._npz = None
+        if filepath.lower().endswith(".npz"):
+            self._npz = np.load(filepath, mmap_mode='r', allow_pickle=False)
+            if MANIFEST_KEY not in self._npz.files:
+                self._npz.close()
+                raise ValueError("Not an attribute archive (manifest missing)")
+            manifest = json.loads(str(self._npz[MANIFEST_KEY]))
+        else:
+            with open(filepath, encoding="utf-8") as f:
+                manifest = json.load(f)
+
+        if manifest.get("version") != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported archive version: {manifest.get('version')}")
+        self.meshes = manifest["meshes"]
+
+    def array(self, attr_entry):
+        key = attr_entry["key"]
+        if self._npz is not None:
+            return self._npz[key]
+        return np.load(os.path.join(os.path.dirname(self.filepath), key), mmap_mode='r', allow_pickle=False)
+
+    def find_entry(self, object_name, mesh_name):
+        """Voce per l'oggetto (o, in mancanza, per la mesh con lo stesso nome)"""
+        for key, name in (("object", object_name), ("mesh", mesh_name)):
+            for entry in self.meshes:
+                if entry.get(key) == name:
+                    return entry
+        return None
+
+    def close(self):
+        if self._npz is not None:
+            self._npz.close()
+            self._npz = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def check_topology(mesh, entry, strict=True):
+    """Motivo per cui la voce non è applicabile alla mesh, None se lo è.
+
+    strict confronta anche il CRC della topologia; altrimenti basta che il
+    numero di elementi di ogni dominio sia lo stesso.
+    """
+    fingerprint = tuple(entry["fingerprint"])
+    current = topology_fingerprint(mesh)
+    if current[:4] != fingerprint[:4]:
+        return "element counts differ"
+    if strict and current != fingerprint:
+        return "topology differs"
+    return None
+
+def import_entry(mesh, archive, entry):
+    """Scrive gli attributi della voce sulla mesh, un foreach_set ciascuno.
+
+    Gli attributi esistenti con tipo o dominio diverso vengono sostituiti;
+    alla fine la mesh viene aggiornata. Restituisce il numero di attributi importati.
+    """
+    count = 0
+    for attr_entry in entry["attributes"]:
+        name, domain, data_type = attr_entry["name"], attr_entry["domain"], attr_entry["data_type"]
+        if data_type not in ATTRIBUTE_LAYOUTS:
+            continue
+
+        values = archive.array(attr_entry)
+        _prop, dtype, size = ATTRIBUTE_LAYOUTS[data_type]
+        if values.shape != (domain_size(mesh, domain), size) or values.dtype != dtype:
+            raise ValueError(f"'{name}' does not match the {domain} domain of {mesh.name}")
+
+        attr = mesh.attributes.get(name)
+        if attr is not None and (attr.data_type != data_type or attr.domain != domain):
+            mesh.attributes.remove(attr)
+            attr = None
+        if attr is None:
+            name = mesh.attributes.new(name=name, type=data_type, domain=domain).name
+            attr = mesh.attributes[name]
+
+        write_attribute(attr, values)
+        count += 1
+
+    if count:
+        mesh.update()
+    return count
@@ -0,0 +1,142 @@
+import numpy as np
+from .mesh_topology import get_topology
+
+
+# Collezione della mesh con i flag select/hide di ogni dominio.
+# I corner non hanno una selezione propria: usano quella del loro vertice.
+_SELECTION_COLLECTIONS = {
+    'POINT': "vertices",
+    'EDGE': "edges",
+    'FACE': "polygons",
+}
+
+
+def _read_flags(collection, flag):
+    values = np.empty(len(collection), dtype=bool)
+    collection.foreach_get(flag, values)
+    return values
+
+def read_selection(mesh, domain):
+    """Maschera degli elementi selezionati del dominio (dati della mesh, Object Mode)"""
+    if domain == 'CORNER':
+        return read_selection(mesh, 'POINT')[get_topology(mesh).corner_vert]
+    return _read_flags(getattr(mesh, _SELECTION_COLLECTIONS[domain]), "select")
+
+def read_hidden(mesh, domain):
+    """Maschera degli elementi nascosti del dominio"""
+    if domain == 'CORNER':
+        return read_hidden(mesh, 'POINT')[get_topology(mesh).corner_vert]
+    return _read_flags(getattr(mesh, _SELECTION_COLLECTIONS[domain]), "hide")
+
+def attribute_mask(values):
+    """Elementi con un valore impostato: diverso da zero in almeno una componente"""
+    return np.any(values != 0, axis=1)
+
+
+def flush_selection(mesh, domain, mask):
+    """Selezione di vertici, edge e facce coerente con la maschera di un dominio.
+
+    Come in Edit Mode: un vertice selezionato seleziona gli edge e le facce
+    che ha completamente selezionati; un edge o una faccia selezionati
+    selezionano i propri vertici (e una faccia i propri edge).
+    Restituisce (vert_select, edge_select, face_select).
+    """
+    topology = get_topology(mesh)
+
+    if domain == 'CORNER':
+        vert_select = np.zeros(topology.vertex_count, dtype=bool)
+        vert_select[topology.corner_vert[mask]] = True
+        domain, mask = 'POINT', vert_select
+
+    if domain == 'POINT':
+        vert_select = mask
+        edge_select = vert_select[topology.edge_verts].all(axis=1)
+    elif domain == 'EDGE':
+        edge_select = mask
+        vert_select = np.zeros(topology.vertex_count, dtype=bool)
+        vert_select[topology.edge_verts[edge_select].ravel()] = True
+    else:
+        face_select = mask
+        corner_select = face_select[topology.corner_face]
+        vert_select = np.zeros(topology.vertex_count, dtype=bool)
+        vert_select[topology.corner_vert[corner_select]] = True
+        edge_select = np.zeros(topology.edge_count, dtype=bool)
+        edge_select[topology.corner_edge[corner_select]] = True
+        return vert_select, edge_select, face_select
+
+    if topology.face_count:
+        face_select = np.logical_and.reduceat(edge_select[topology.corner_edge], topology.loop_starts)
+    else:
+        face_select = np.zeros(0, dtype=bool)
+    return vert_select, edge_select, face_select
+
+def write_selection(mesh, domain, mask, extend=False):
+    """Imposta la selezione della mesh dalla maschera di un dominio.
+
+    Con extend=True la maschera si aggiunge alla selezione esistente del
+    dominio prima del flush, così gli elementi tra un vecchio e un nuovo
+    selezionato vengono selezionati come in Edit Mode.
+    Gli elementi nascosti non vengono selezionati. Tre foreach_set in tutto,
+    uno per vertici, edge e facce. Il chiamante aggiorna la mesh
+    (mesh.update()) dopo aver finito di scrivere.
+    """
+    collections = (mesh.vertices, mesh.edges, mesh.polygons)
+    if extend:
+        mask = mask | read_selection(mesh, domain)
+    mask = mask & ~read_hidden(mesh, domain)
+    for collection, select in zip(collections, flush_selection(mesh, domain, mask)):
+        if extend:
+            # Vertici ed edge selezionati fuori dal dominio restano selezionati
+            select = select | _read_flags(collection, "select")
+        collection.foreach_set("select", select)
+
+
+# =============================================================================
+# SELEZIONE PER VALORE
+# =============================================================================
+
+COMPARE_ITEMS = [
+    ('GREATER', "Greater Than", "Value greater than the threshold"),
+    ('LESS', "Less Than", "Value less than the threshold"),
+    ('BETWEEN', "Between", "Value between the minimum and the maximum (inclusive)"),
+    ('EQUAL', "Equal", "Value equal to the threshold within epsilon"),
+]
+
+COMPONENT_ITEMS = [
+    ('X', "X", "First component (red for colors)"),
+    ('Y', "Y", "Second component (green for colors)"),
+    ('Z', "Z", "Third component (blue for colors)"),
+    ('W', "W", "Fourth component (alpha for colors)"),
+    ('LENGTH', "Length", "Length of the vector"),
+]
+
+_COMPONENT_INDEX = {'X': 0, 'Y': 1, 'Z': 2, 'W': 3}
+
+
+def component_values(values, component):
+    """Colonna di values (elementi, componenti) da confrontare.
+
+    Gli attributi scalari usano sempre il loro unico valore. Restituisce
+    None se il componente non esiste per l'attributo (es. W di un vettore).
+    """
+    if values.shape[1] == 1:
+        return values[:, 0]
+    if component == 'LENGTH':
+        return np.linalg.norm(values.astype(np.float64), axis=1)
+    index = _COMPONENT_INDEX[component]
+    if index >= values.shape[1]:
+        return None
+    return values[:, index]
+
+def value_mask(values, compare, threshold, threshold_max=0.0, epsilon=1e-4):
+    """Maschera degli elementi il cui valore (array 1D) soddisfa il confronto"""
+    if values.dtype == bool:
+        values = values.astype(np.int8)
+    if compare == 'GREATER':
+        return values > threshold
+    if compare == 'LESS':
+        return values < threshold
+    if compare == 'BETWEEN':
+        low, high = sorted((threshold, threshold_max))
+        return (values >= low) & (values <= high)
+    return np.abs(values - threshold) <= epsilon
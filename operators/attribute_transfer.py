@@ -0,0 +1,253 @@
+import bpy
+import numpy as np
+from collections import OrderedDict, namedtuple
+from bpy.app.handlers import persistent
+from mathutils.bvhtree import BVHTree
+from .attribute_domains import ATTRIBUTE_LAYOUTS, domain_pairs, read_attribute, reduce_pairs, write_attribute
+from .mesh_cache import geometry_generation, get_cached
+from .mesh_topology import get_topology
+
+
+# Superficie della sorgente in spazio locale: BVH dei triangoli e, per ogni
+# triangolo, i suoi vertici, corner e faccia
+SourceSurface = namedtuple("SourceSurface", ("bvh", "co", "tri_verts", "tri_loops", "tri_faces"))
+
+# Risultato delle ricerche per ogni elemento della destinazione: triangolo
+# più vicino (-1 se oltre la distanza massima) e pesi baricentrici
+TransferMap = namedtuple("TransferMap", ("tri", "weights"))
+
+# Numero massimo di mappature tenute in cache
+MAX_CACHED_MAPS = 16
+
+# (sorgente, destinazione, dominio, distanza) -> (stato, TransferMap)
+_map_cache = OrderedDict()
+
+# Spostamento dei corner verso il centro della faccia, per cercare dal lato giusto
+CORNER_INSET = 0.01
+
+
+def _vertex_positions(mesh):
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+    mesh.vertices.foreach_get("co", co)
+    return co.reshape(-1, 3)
+
+def _build_source_surface(mesh):
+    mesh.calc_loop_triangles()
+    count = len(mesh.loop_triangles)
+    tri_verts = np.empty(count * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", tri_verts)
+    tri_loops = np.empty(count * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("loops", tri_loops)
+    tri_faces = np.empty(count, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("polygon_index", tri_faces)
+
+    co = _vertex_positions(mesh)
+    tri_verts = tri_verts.reshape(-1, 3)
+    bvh = BVHTree.FromPolygons(co.tolist(), tri_verts.tolist(), all_triangles=True)
+    return SourceSurface(bvh, co, tri_verts, tri_loops.reshape(-1, 3), tri_faces)
+
+def get_source_surface(mesh):
+    """BVH dei triangoli della mesh (in cache finché la geometria non cambia)"""
+    return get_cached(mesh, "transfer_surface", _build_source_surface)
+
+
+def element_positions(mesh, domain):
+    """Posizione locale di ogni elemento del dominio: vertici, centro degli
+    edge e delle facce, corner spostati appena verso il centro della faccia"""
+    co = _vertex_positions(mesh)
+    if domain == 'POINT':
+        return co
+
+    topology = get_topology(mesh)
+    if domain == 'EDGE':
+        return co[topology.edge_verts].mean(axis=1)
+
+    centers = np.empty(topology.face_count * 3, dtype=np.float64)
+    mesh.polygons.foreach_get("center", centers)
+    centers = centers.reshape(-1, 3)
+    if domain == 'FACE':
+        return centers
+
+    corner_co = co[topology.corner_vert]
+    return corner_co + (centers[topology.corner_face] - corner_co) * CORNER_INSET
+
+def relative_matrix(source, target):
+    """Matrice dallo spazio locale di target a quello di source, come array 4x4.
+    ValueError se la sorgente ha una scala nulla (matrice non invertibile)."""
+    try:
+        inverse = source.matrix_world.inverted()
+    except ValueError:
+        raise ValueError(f"'{source.name}' has a zero scale and cannot be used as source")
+    return np.array(inverse @ target.matrix_world)
+
+def _barycentric(points, a, b, c):
+    v0, v1, v2 = b - a, c - a, points - a
+    d00 = np.einsum('ij,ij->i', v0, v0)
+    d01 = np.einsum('ij,ij->i', v0, v1)
+    d11 = np.einsum('ij,ij->i', v1, v1)
+    d20 = np.einsum('ij,ij->i', v2, v0)
+    d21 = np.einsum('ij,ij->i', v2, v1)
+    denom = d00 * d11 - d01 * d01
+
+    # Triangoli degeneri: tutto il peso al primo vertice
+    valid = np.abs(denom) > 1e-20
+    safe = np.where(valid, denom, 1.0)
+    v = np.where(valid, (d11 * d20 - d01 * d21) / safe, 0.0)
+    w = np.where(valid, (d00 * d21 - d01 * d20) / safe, 0.0)
+    # find_nearest restituisce punti sul triangolo: si eliminano solo gli errori numerici
+    weights = np.clip(np.stack((1.0 - v - w, v, w), axis=1), 0.0, 1.0)
+    return weights / np.maximum(weights.sum(axis=1, keepdims=True), 1e-20)
+
+def _build_map(source, target, domain, max_distance):
+    surface = get_source_surface(source.data)
+
+    # Elementi della destinazione nello spazio locale della sorgente
+    matrix = relative_matrix(source, target)
+    points = element_positions(target.data, domain) @ matrix[:3, :3].T + matrix[:3, 3]
+
+    find_nearest = surface.bvh.find_nearest
+    distance = max_distance if max_distance > 0 else 1.0e30
+    tri = np.full(len(points), -1, dtype=np.int64)
+    locations = np.zeros_like(points)
+    for i, point in enumerate(points.tolist()):
+        location, _normal, index, _dist = find_nearest(point, distance)
+        if index is not None:
+            tri[i] = index
+            locations[i] = location
+
+    weights = np.zeros((len(points), 3))
+    found = tri >= 0
+    if found.any():
+        corners = surface.co[surface.tri_verts[tri[found]]]
+        weights[found] = _barycentric(locations[found], corners[:, 0], corners[:, 1], corners[:, 2])
+    return TransferMap(tri, weights)
+
+def get_transfer_map(source, target, domain, max_distance=0.0):
+    """Mappatura tra gli elementi del dominio di target e la superficie di source.
+
+    Le ricerche sul BVH si fanno una volta sola: la mappatura resta in cache
+    finché non cambiano la geometria delle due mesh o la loro posizione
+    relativa, e serve per tutti gli attributi trasferiti. Gli oggetti devono
+    essere in Object Mode. ValueError se la sorgente ha una scala nulla.
+    """
+    key = (source.session_uid, target.session_uid, domain, max_distance)
+    relative = relative_matrix(source, target).tobytes()
+    state = (geometry_generation(source.data), geometry_generation(target.data),
+             len(source.data.vertices), len(target.data.vertices), relative)
+
+    cached = _map_cache.get(key)
+    if cached is not None and cached[0] == state:
+        _map_cache.move_to_end(key)
+        return cached[1]
+
+    transfer_map = _build_map(source, target, domain, max_distance)
+    _map_cache[key] = (state, transfer_map)
+    _map_cache.move_to_end(key)
+    while len(_map_cache) > MAX_CACHED_MAPS:
+        _map_cache.popitem(last=False)
+    return transfer_map
+
+
+# =============================================================================
+# TRASFERIMENTO
+# =============================================================================
+
+def sample_attribute(source_mesh, attr, transfer_map, interpolate=True):
+    """Valori dell'attributo della sorgente negli elementi mappati.
+
+    Vertici e corner si interpolano con i pesi baricentrici (o prendono il
+    più vicino), le facce usano la faccia del triangolo trovato e gli edge
+    passano prima ai vertici con la media. Restituisce un array con una riga
+    per elemento mappato (quelli non trovati hanno valore zero).
+    """
+    surface = get_source_surface(source_mesh)
+    values = read_attribute(attr)
+    domain = attr.domain
+
+    if domain == 'EDGE':
+        dst_idx, src_idx = domain_pairs(source_mesh, 'EDGE', 'POINT')
+        values = reduce_pairs(values, dst_idx, src_idx, len(source_mesh.vertices), 'MEAN')
+        domain = 'POINT'
+
+    found = transfer_map.tri >= 0
+    tri = transfer_map.tri[found]
+    result = np.zeros((len(transfer_map.tri), values.shape[1]), dtype=values.dtype)
+
+    if domain == 'FACE':
+        result[found] = values[surface.tri_faces[tri]]
+        return result
+
+    corners = surface.tri_verts[tri] if domain == 'POINT' else surface.tri_loops[tri]
+    weights = transfer_map.weights[found]
+    if not interpolate:
+        nearest = corners[np.arange(len(corners)), np.argmax(weights, axis=1)]
+        result[found] = values[nearest]
+        return result
+
+    mixed = np.einsum('ij,ijk->ik', weights, values[corners].astype(np.float64))
+    if values.dtype == bool:
+        result[found] = mixed >= 0.5
+    elif np.issubdtype(values.dtype, np.integer):
+        result[found] = np.rint(mixed)
+    else:
+        if attr.data_type == 'QUATERNION':
+            lengths = np.linalg.norm(mixed, axis=1, keepdims=True)
+            np.divide(mixed, lengths, out=mixed, where=lengths > 0)
+        result[found] = mixed
+    return result
+
+def transfer_attributes(source, target, names, interpolate=True, max_distance=0.0):
+    """Copia gli attributi names da source a target (oggetti mesh, Object Mode).
+
+    Ogni attributo arriva nello stesso dominio e tipo: un attributo della
+    destinazione con tipo o dominio diverso viene sostituito. Gli elementi
+    senza superficie entro max_distance mantengono il valore precedente.
+    Alla fine la destinazione viene aggiornata. Restituisce il numero di
+    attributi trasferiti.
+    """
+    source_mesh, target_mesh = source.data, target.data
+    count = 0
+    for name in names:
+        attr = source_mesh.attributes.get(name)
+        if attr is None or attr.data_type not in ATTRIBUTE_LAYOUTS or attr.domain not in {'POINT', 'EDGE', 'FACE', 'CORNER'}:
+            continue
+        data_type, domain = attr.data_type, attr.domain
+
+        transfer_map = get_transfer_map(source, target, domain, max_distance)
+        sampled = sample_attribute(source_mesh, attr, transfer_map, interpolate)
+
+        target_attr = target_mesh.attributes.get(name)
+        if target_attr is not None and (target_attr.data_type != data_type or target_attr.domain != domain):
+            target_mesh.attributes.remove(target_attr)
+            target_attr = None
+        if target_attr is None:
+            new_name = target_mesh.attributes.new(name=name, type=data_type, domain=domain).name
+            target_attr = target_mesh.attributes[new_name]
+
+        values = read_attribute(target_attr)
+        found = transfer_map.tri >= 0
+        values[found] = sampled[found]
+        write_attribute(target_attr, values)
+        count += 1
+
+    if count:
+        target_mesh.update()
+    return count
+
+def invalidate_transfer_maps():
+    """Svuota la cache delle mappature"""
+    _map_cache.clear()
+
+
+@persistent
+def _attribute_transfer_load_post(dummy):
+    _map_cache.clear()
+
+
+def attribute_transfer_register():
+    bpy.app.handlers.load_post.append(_attribute_transfer_load_post)
+
+def attribute_transfer_unregister():
+    if _attribute_transfer_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_attribute_transfer_load_post)
+    _map_cache.clear()
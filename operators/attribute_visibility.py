@@ -0,0 +1,42 @@
+from functools import lru_cache
+
+
+# Attributi di sistema da nascondere di default
+SYSTEM_ATTRIBUTES = {
+    'position', 'UVMap', 'material_index', 'sharp_edge',
+    'sharp_face', '.corner_edge', '.corner_vert', '.edge_verts'
+}
+
+
+@lru_cache(maxsize=4096)
+def is_system_attribute(name):
+    """True per gli attributi di sistema, interni (.nome) e per le UV map"""
+    return name in SYSTEM_ATTRIBUTES or name.startswith('.') or name.startswith('UVMap')
+
+def attribute_visibility(mesh, show_system):
+    """Visibilità nella lista di ogni attributo della mesh, nello stesso
+    ordine di mesh.attributes. Un solo keys() in C, poi un lookup per nome."""
+    names = mesh.attributes.keys()
+    if show_system:
+        return [True] * len(names)
+    return [not is_system_attribute(name) for name in names]
+
+def attribute_filter_flags(mesh, show_system, bitflag):
+    """Flag per UIList.filter_items (bitflag per i visibili, 0 per i nascosti)"""
+    return [bitflag if visible else 0 for visible in attribute_visibility(mesh, show_system)]
+
+def visible_attribute_names(mesh, show_system=False):
+    """Nomi degli attributi mostrati nella lista"""
+    names = mesh.attributes.keys()
+    if show_system:
+        return names
+    return [name for name in names if not is_system_attribute(name)]
+
+def is_active_attribute_visible(mesh, show_system):
+    """True se la mesh ha un attributo attivo ed è visibile nella lista.
+    Legge solo l'attributo attivo, per i poll."""
+    attributes = mesh.attributes
+    index = attributes.active_index
+    if not 0 <= index < len(attributes):
+        return False
+    return show_system or not is_system_attribute(attributes[index].name)
@@ -1,12 +1,24 @@
 import bpy
-from bpy.types import Panel, Operator, PropertyGroup, UIList, Menu
-from bpy.props import FloatProperty, StringProperty, IntProperty, BoolProperty
-
-# Attributi di sistema da nascondere di default
-SYSTEM_ATTRIBUTES = {
-    'position', 'UVMap', 'material_index', 'sharp_edge', 
-    'sharp_face', '.corner_edge', '.corner_vert', '.edge_verts'
-}
+import os
+import numpy as np
+from contextlib import contextmanager
+from bpy.types import Operator, PropertyGroup, UIList, Menu
+from bpy.props import FloatProperty, StringProperty, IntProperty, BoolProperty, FloatVectorProperty
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+from .attribute_domains import (
+    ATTRIBUTE_LAYOUTS, REDUCTION_ITEMS, convert_attribute_domain, read_attribute, write_attribute,
+)
+from .attribute_expression import evaluate_expression, store_result
+from .attribute_transfer import transfer_attributes
+from .attribute_visibility import (
+    attribute_filter_flags, is_active_attribute_visible, visible_attribute_names,
+)
+from .attribute_io import AttributeArchive, check_topology, export_attributes, import_entry
+from .attribute_selection import (
+    COMPARE_ITEMS, COMPONENT_ITEMS, attribute_mask, component_values, read_selection, value_mask,
+    write_selection,
+)
+from .mesh_cache import mark_selection_update
 
 # UIList personalizzata per gli attributi con icone custom
 class MESH_UL_attributes_custom(UIList):
@@ -45,23 +57,11 @@ def draw_item(self, context, layout, data, item, icon, active_data, active_propn
             layout.label(text="", icon='MESH_DATA')
     
     def filter_items(self, context, data, propname):
-        attrs = getattr(data, propname)
         props = context.scene.attributes_panel_props
         
-        flt_flags = []
-        flt_neworder = []
-        
-        # Filtra attributi di sistema
-        if not props.show_system_attributes:
-            for attr in attrs:
-                if attr.name in SYSTEM_ATTRIBUTES or attr.name.startswith('.') or attr.name == 'UVMap' or attr.name.startswith('UVMap'):
-                    flt_flags.append(0)  # Nascosto
-                else:
-                    flt_flags.append(self.bitflag_filter_item)  # Visibile
-        else:
-            flt_flags = [self.bitflag_filter_item] * len(attrs)
-        
-        return flt_flags, flt_neworder
+        # Filtra attributi di sistema (controlli per nome memorizzati)
+        flt_flags = attribute_filter_flags(data.id_data, props.show_system_attributes, self.bitflag_filter_item)
+        return flt_flags, []
 
 # Property Group per salvare le proprietà
 class AttributesPanelProperties(PropertyGroup):
@@ -73,6 +73,74 @@ class AttributesPanelProperties(PropertyGroup):
         description="Weight value for attribute"
     )
     
+    int_value: IntProperty(
+        name="Integer",
+        default=1,
+        description="Value assigned to integer attributes"
+    )
+    
+    vector_value: FloatVectorProperty(
+        name="Vector",
+        size=3,
+        default=(0.0, 0.0, 1.0),
+        description="Value assigned to vector attributes (2D vectors use X and Y)"
+    )
+    
+    color_value: FloatVectorProperty(
+        name="Color",
+        subtype='COLOR',
+        size=4,
+        min=0.0,
+        max=1.0,
+        default=(1.0, 1.0, 1.0, 1.0),
+        description="Value assigned to color attributes"
+    )
+    
+    quaternion_value: FloatVectorProperty(
+        name="Rotation",
+        subtype='QUATERNION',
+        size=4,
+        default=(1.0, 0.0, 0.0, 0.0),
+        description="Value assigned to quaternion attributes"
+    )
+    
+    # Falloff per gli attributi di vertice
+    falloff: bpy.props.EnumProperty(
+        name="Falloff",
+        description="Blend the assigned value over the vertices",
+        items=[
+            ('NONE', "None", "Assign the full value"),
+            ('LINEAR', "Linear Gradient", "Gradient along an axis, from the lowest to the highest affected vertex"),
+            ('CURSOR', "3D Cursor", "Full value at the 3D cursor, fading out at the radius"),
+        ],
+        default='NONE'
+    )
+    
+    falloff_axis: bpy.props.EnumProperty(
+        name="Axis",
+        description="World axis of the linear gradient",
+        items=[
+            ('X', "X", ""),
+            ('Y', "Y", ""),
+            ('Z', "Z", ""),
+        ],
+        default='Z'
+    )
+    
+    falloff_invert: BoolProperty(
+        name="Invert",
+        default=False,
+        description="Full value at the start of the gradient instead of the end"
+    )
+    
+    falloff_radius: FloatProperty(
+        name="Radius",
+        default=1.0,
+        min=0.0001,
+        subtype='DISTANCE',
+        description="Distance from the 3D cursor where the value fades to nothing"
+    )
+    
     # MODIFICA QUESTA PROPERTY per usare il valore dalle preferences
     show_system_attributes: BoolProperty(
         name="Show System Attributes",
@@ -153,20 +221,10 @@ class MESH_OT_attribute_remove_selected(Operator):
     def poll(cls, context):
         if not context.object or context.object.type != 'MESH':
             return False
-        mesh = context.object.data
         props = context.scene.attributes_panel_props
         
-        # Verifica che ci sia un attributo selezionato
-        if mesh.attributes.active_index < 0 or mesh.attributes.active_index >= len(mesh.attributes):
-            return False
-        
-        # Verifica che l'attributo selezionato sia visibile (non filtrato)
-        attr = mesh.attributes[mesh.attributes.active_index]
-        if not props.show_system_attributes:
-            if attr.name in SYSTEM_ATTRIBUTES or attr.name.startswith('.') or attr.name == 'UVMap' or attr.name.startswith('UVMap'):
-                return False
-        
-        return True
+        # Serve un attributo attivo visibile nella lista (non filtrato)
+        return is_active_attribute_visible(context.object.data, props.show_system_attributes)
     
     def execute(self, context):
         obj = context.object
@@ -193,31 +251,27 @@ class MESH_OT_attribute_convert(Operator):
             ('POINT', "Vertex", "Convert to vertex attribute"),
             ('EDGE', "Edge", "Convert to edge attribute"),
             ('FACE', "Face", "Convert to face attribute"),
+            ('CORNER', "Face Corner", "Convert to face corner attribute"),
         ]
     )
     
+    reduction: bpy.props.EnumProperty(
+        name="Reduction",
+        description="How values meeting on the same element are combined",
+        items=REDUCTION_ITEMS,
+        default='MAX'
+    )
+    
     @classmethod
     def poll(cls, context):
         if not context.object or context.object.type != 'MESH':
             return False
-        mesh = context.object.data
         props = context.scene.attributes_panel_props
         
-        # Verifica che ci sia un attributo selezionato
-        if mesh.attributes.active_index < 0 or mesh.attributes.active_index >= len(mesh.attributes):
-            return False
-        
-        # Verifica che l'attributo selezionato sia visibile (non filtrato)
-        attr = mesh.attributes[mesh.attributes.active_index]
-        if not props.show_system_attributes:
-            if attr.name in SYSTEM_ATTRIBUTES or attr.name.startswith('.') or attr.name == 'UVMap' or attr.name.startswith('UVMap'):
-                return False
-        
-        return True
+        # Serve un attributo attivo visibile nella lista (non filtrato)
+        return is_active_attribute_visible(context.object.data, props.show_system_attributes)
     
     def execute(self, context):
-        import bmesh
-        
         obj = context.object
         mesh = obj.data
         attr = mesh.attributes[mesh.attributes.active_index]
@@ -226,301 +280,733 @@ def execute(self, context):
             self.report({'INFO'}, f"Attribute already in {self.domain} domain")
             return {'CANCELLED'}
         
-        # Salva i dati
+        if attr.data_type not in ATTRIBUTE_LAYOUTS:
+            self.report({'WARNING'}, f"Data type {attr.data_type} not supported for conversion")
+            return {'CANCELLED'}
+        
         old_name = attr.name
-        old_type = attr.data_type
-        old_domain = attr.domain
-        
-        # Leggi i valori dall'attributo originale
-        old_values = {}
-        if old_type == 'BOOLEAN':
-            for i, elem in enumerate(attr.data):
-                old_values[i] = elem.value
-        elif old_type == 'FLOAT':
-            for i, elem in enumerate(attr.data):
-                old_values[i] = elem.value
-        elif old_type == 'INT':
-            for i, elem in enumerate(attr.data):
-                old_values[i] = elem.value
-        
-        # Crea nuovo attributo con dominio diverso
-        new_attr = mesh.attributes.new(name=old_name + "_temp", type=old_type, domain=self.domain)
-        
-        # Usa bmesh per mappare i valori tra domini
-        bm = bmesh.new()
-        bm.from_mesh(mesh)
-        bm.verts.ensure_lookup_table()
-        bm.edges.ensure_lookup_table()
-        bm.faces.ensure_lookup_table()
-        
-        # Mappa i valori dal dominio vecchio al nuovo
-        new_values = {}
-        
-        if old_domain == 'FACE' and self.domain == 'POINT':
-            # Da Face a Vertex: ogni vertice prende il valore delle facce a cui appartiene
-            for i, face in enumerate(bm.faces):
-                if i in old_values and old_values[i]:
-                    for vert in face.verts:
-                        new_values[vert.index] = old_values[i]
-        
-        elif old_domain == 'FACE' and self.domain == 'EDGE':
-            # Da Face a Edge: ogni edge prende il valore delle facce a cui appartiene
-            for i, face in enumerate(bm.faces):
-                if i in old_values and old_values[i]:
-                    for edge in face.edges:
-                        new_values[edge.index] = old_values[i]
-        
-        elif old_domain == 'POINT' and self.domain == 'FACE':
-            # Da Vertex a Face: la faccia è True se almeno un vertice è True
-            for i, face in enumerate(bm.faces):
-                for vert in face.verts:
-                    if vert.index in old_values and old_values[vert.index]:
-                        new_values[i] = old_values[vert.index]
-                        break
-        
-        elif old_domain == 'POINT' and self.domain == 'EDGE':
-            # Da Vertex a Edge: l'edge è True se almeno un vertice è True
-            for i, edge in enumerate(bm.edges):
-                for vert in edge.verts:
-                    if vert.index in old_values and old_values[vert.index]:
-                        new_values[i] = old_values[vert.index]
-                        break
-        
-        elif old_domain == 'EDGE' and self.domain == 'POINT':
-            # Da Edge a Vertex: ogni vertice prende il valore degli edge a cui appartiene
-            for i, edge in enumerate(bm.edges):
-                if i in old_values and old_values[i]:
-                    for vert in edge.verts:
-                        new_values[vert.index] = old_values[i]
-        
-        elif old_domain == 'EDGE' and self.domain == 'FACE':
-            # Da Edge a Face: la faccia è True se almeno un edge è True
-            for i, face in enumerate(bm.faces):
-                for edge in face.edges:
-                    if edge.index in old_values and old_values[edge.index]:
-                        new_values[i] = old_values[edge.index]
-                        break
-        
-        bm.free()
-        
-        # Applica i nuovi valori
-        if old_type == 'BOOLEAN':
-            for i, elem in enumerate(new_attr.data):
-                elem.value = new_values.get(i, False)
-        elif old_type == 'FLOAT':
-            for i, elem in enumerate(new_attr.data):
-                elem.value = new_values.get(i, 0.0)
-        elif old_type == 'INT':
-            for i, elem in enumerate(new_attr.data):
-                elem.value = new_values.get(i, 0)
-        
-        # Rimuovi vecchio attributo
-        mesh.attributes.remove(attr)
-        
-        # Rinomina nuovo attributo
-        new_attr.name = old_name
+        
+        # I dati della mesh sono aggiornati solo in Object Mode
+        was_edit_mode = obj.mode == 'EDIT'
+        if was_edit_mode:
+            bpy.ops.object.mode_set(mode='OBJECT')
+        
+        new_attr = convert_attribute_domain(mesh, old_name, self.domain, self.reduction)
+        mesh.attributes.active = new_attr
+        
+        if was_edit_mode:
+            bpy.ops.object.mode_set(mode='EDIT')
         
         self.report({'INFO'}, f"Converted {old_name} to {self.domain}")
         return {'FINISHED'}
 
+# Funzioni comuni per Assign/Remove/Select/Deselect
+def get_target_objects(context):
+    """Oggetti su cui operare: quelli in Edit Mode, oppure tutte le mesh
+    selezionate in Object Mode. Per le mesh condivise si tiene un solo oggetto."""
+    if context.mode == 'EDIT_MESH':
+        objects = list(context.objects_in_mode_unique_data)
+    else:
+        objects = list(context.selected_objects)
+        if context.object and context.object not in objects:
+            objects.append(context.object)
+    
+    targets = {}
+    for obj in objects:
+        if obj.type == 'MESH' and obj.data.library is None:
+            targets.setdefault(obj.data.session_uid, obj)
+    return list(targets.values())
+
+def get_target_meshes(context):
+    """Mesh su cui operare (vedi get_target_objects), una volta sola ciascuna"""
+    return [obj.data for obj in get_target_objects(context)]
+
+@contextmanager
+def mesh_data_mode(context):
+    """Passa a Object Mode (un solo cambio per tutti gli oggetti) per lavorare
+    sui dati delle mesh. Restituisce True se si era in Edit Mode: in quel caso
+    si opera sugli elementi selezionati, altrimenti sulle mesh intere."""
+    was_edit_mode = context.mode == 'EDIT_MESH'
+    if was_edit_mode:
+        bpy.ops.object.mode_set(mode='OBJECT')
+    try:
+        yield was_edit_mode
+    finally:
+        if was_edit_mode:
+            bpy.ops.object.mode_set(mode='EDIT')
+
+def blend_values(values, value, weights):
+    """Valori esistenti portati verso value in proporzione a weights (0-1).
+
+    I booleani prendono value dove il peso è almeno 0.5, gli interi vengono
+    arrotondati e limitati al loro intervallo.
+    """
+    if values.dtype == bool:
+        result = values.copy()
+        result[weights >= 0.5] = value
+        return result
+    
+    target = np.broadcast_to(np.asarray(value, dtype=np.float64), values.shape)
+    result = values + (target - values) * weights[:, None]
+    if np.issubdtype(values.dtype, np.integer):
+        info = np.iinfo(values.dtype)
+        return np.clip(np.rint(result), info.min, info.max).astype(values.dtype)
+    return result.astype(values.dtype)
+
+def falloff_weights(obj, mesh, mask, props, cursor_location):
+    """Peso del falloff (0-1) di ogni vertice della mesh, in spazio mondo.
+
+    Il gradiente lineare va dal vertice più basso al più alto tra quelli
+    in mask lungo l'asse scelto; il falloff dal cursore è lineare fino al raggio.
+    """
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+    mesh.vertices.foreach_get("co", co)
+    matrix = np.array(obj.matrix_world)
+    co = co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+    
+    if props.falloff == 'CURSOR':
+        distance = np.linalg.norm(co - np.asarray(cursor_location), axis=1)
+        weights = 1.0 - distance / props.falloff_radius
+    else:
+        coord = co[:, "XYZ".index(props.falloff_axis)]
+        if mask.any():
+            low, high = coord[mask].min(), coord[mask].max()
+        else:
+            low, high = 0.0, 0.0
+        if high > low:
+            weights = (coord - low) / (high - low)
+        else:
+            weights = np.ones(len(coord))
+        if props.falloff_invert:
+            weights = 1.0 - weights
+    return np.clip(weights, 0.0, 1.0)
+
+def assign_attribute_value(meshes, name, data_type, domain, value, selected_only, create=False, falloff=None):
+    """Scrive value sugli elementi dell'attributo name di ogni mesh, con un
+    solo foreach_set per mesh. Con create=True l'attributo viene aggiunto
+    alle mesh che non lo hanno. falloff, se indicato, è una funzione
+    (mesh, maschera) -> pesi 0-1 per elemento con cui sfumare il valore.
+    Restituisce il numero di mesh modificate."""
+    count = 0
+    for mesh in meshes:
+        attr = mesh.attributes.get(name)
+        if attr is None:
+            if not create:
+                continue
+            mesh.attributes.new(name=name, type=data_type, domain=domain)
+            attr = mesh.attributes[name]
+        elif attr.data_type != data_type or attr.domain != domain:
+            continue
+        
+        values = read_attribute(attr)
+        if falloff is not None:
+            if selected_only:
+                mask = read_selection(mesh, domain)
+            else:
+                mask = np.ones(len(values), dtype=bool)
+            weights = falloff(mesh, mask)
+            weights[~mask] = 0.0
+            values = blend_values(values, value, weights)
+        elif selected_only:
+            values[read_selection(mesh, domain)] = value
+        else:
+            values[:] = value
+        write_attribute(attr, values)
+        
+        # foreach_set non avvisa il depsgraph: modificatori e viewport vanno aggiornati
+        mesh.update()
+        count += 1
+    return count
+
+def select_by_attribute_value(meshes, name, select=True):
+    """Seleziona (o deseleziona) gli elementi con l'attributo impostato.
+    Restituisce il numero di mesh che hanno l'attributo."""
+    count = 0
+    for mesh in meshes:
+        attr = mesh.attributes.get(name)
+        if attr is None or attr.data_type not in ATTRIBUTE_LAYOUTS:
+            continue
+        
+        is_set = attribute_mask(read_attribute(attr))
+        if select:
+            write_selection(mesh, attr.domain, is_set, extend=True)
+        else:
+            write_selection(mesh, attr.domain, read_selection(mesh, attr.domain) & ~is_set)
+        
+        # Cambia solo la selezione: l'aggiornamento non invalida le cache
+        mark_selection_update(mesh)
+        mesh.update()
+        count += 1
+    return count
+
+def select_by_attribute_range(meshes, name, component, compare, threshold, threshold_max, epsilon, action='SET'):
+    """Seleziona gli elementi il cui valore soddisfa il confronto.
+
+    action è SET (sostituisce la selezione), ADD o SUBTRACT. Restituisce il
+    numero di mesh che hanno l'attributo con il componente richiesto.
+    """
+    count = 0
+    for mesh in meshes:
+        attr = mesh.attributes.get(name)
+        if attr is None or attr.data_type not in ATTRIBUTE_LAYOUTS:
+            continue
+        
+        values = component_values(read_attribute(attr), component)
+        if values is None:
+            continue
+        
+        mask = value_mask(values, compare, threshold, threshold_max, epsilon)
+        if action == 'SUBTRACT':
+            write_selection(mesh, attr.domain, read_selection(mesh, attr.domain) & ~mask)
+        else:
+            write_selection(mesh, attr.domain, mask, extend=(action == 'ADD'))
+        
+        mark_selection_update(mesh)
+        mesh.update()
+        count += 1
+    return count
+
+# Proprietà del pannello con il valore da assegnare per ogni tipo di dato
+PANEL_VALUE_PROPS = {
+    'BOOLEAN': "weight",
+    'FLOAT': "weight",
+    'INT': "int_value",
+    'INT8': "int_value",
+    'INT32_2D': "vector_value",
+    'FLOAT2': "vector_value",
+    'FLOAT_VECTOR': "vector_value",
+    'FLOAT_COLOR': "color_value",
+    'BYTE_COLOR': "color_value",
+    'QUATERNION': "quaternion_value",
+}
+
+def panel_value(data_type, props):
+    """Valore da assegnare preso dal pannello, None se il tipo non è supportato"""
+    prop = PANEL_VALUE_PROPS.get(data_type)
+    if prop is None:
+        return None
+    if data_type == 'BOOLEAN':
+        # Per booleani usa weight > 0.5 come True
+        return props.weight > 0.5
+    
+    value = np.array(getattr(props, prop), dtype=np.float64)
+    size = ATTRIBUTE_LAYOUTS[data_type][2]
+    if value.ndim:
+        value = value[:size]
+    if data_type == 'INT8':
+        value = np.clip(value, -128, 127)
+    elif data_type == 'INT32_2D':
+        value = np.rint(value)
+    return value
+
 # Operatori per Assign/Remove/Select/Deselect
 class MESH_OT_attribute_assign(Operator):
     bl_idname = "mesh.attribute_assign"
     bl_label = "Assign"
-    bl_description = "Assign attribute value to selection"
+    bl_description = "Assign the panel value to the selection (Edit Mode) or to the selected objects (Object Mode)"
     bl_options = {'REGISTER', 'UNDO'}
     
     @classmethod
     def poll(cls, context):
-        if context.mode != 'EDIT_MESH' or not context.object or context.object.type != 'MESH':
+        if context.mode not in {'EDIT_MESH', 'OBJECT'} or not context.object or context.object.type != 'MESH':
             return False
-        mesh = context.object.data
         props = context.scene.attributes_panel_props
         
-        # Verifica che ci sia un attributo selezionato
-        if mesh.attributes.active_index < 0 or mesh.attributes.active_index >= len(mesh.attributes):
-            return False
-        
-        # Verifica che l'attributo selezionato sia visibile (non filtrato)
-        attr = mesh.attributes[mesh.attributes.active_index]
-        if not props.show_system_attributes:
-            if attr.name in SYSTEM_ATTRIBUTES or attr.name.startswith('.') or attr.name == 'UVMap' or attr.name.startswith('UVMap'):
-                return False
-        
-        return True
+        # Serve un attributo attivo visibile nella lista (non filtrato)
+        return is_active_attribute_visible(context.object.data, props.show_system_attributes)
     
     def execute(self, context):
-        obj = context.object
-        mesh = obj.data
+        mesh = context.object.data
         props = context.scene.attributes_panel_props
-        
         attr = mesh.attributes[mesh.attributes.active_index]
         
-        # Imposta l'attributo attivo
-        mesh.attributes.active = attr
-        
-        # Usa l'operatore nativo di Blender per assegnare attributi
-        if attr.data_type == 'BOOLEAN':
-            # Per booleani usa weight > 0.5 come True
-            value_bool = props.weight > 0.5
-            bpy.ops.mesh.attribute_set(value_bool=value_bool)
-        elif attr.data_type == 'FLOAT':
-            # Per float usa il valore weight direttamente
-            bpy.ops.mesh.attribute_set(value_float=props.weight)
-        elif attr.data_type == 'INT':
-            # Per int converte weight in intero
-            bpy.ops.mesh.attribute_set(value_int=int(props.weight * 100))
-        else:
+        value = panel_value(attr.data_type, props)
+        if value is None:
             self.report({'WARNING'}, f"Data type {attr.data_type} not supported for assignment")
             return {'CANCELLED'}
         
-        self.report({'INFO'}, f"Assigned value to selection")
+        name, data_type, domain = attr.name, attr.data_type, attr.domain
+        objects = get_target_objects(context)
+        meshes = [obj.data for obj in objects]
+        
+        falloff = None
+        if domain == 'POINT' and props.falloff != 'NONE':
+            owners = {obj.data.session_uid: obj for obj in objects}
+            cursor_location = context.scene.cursor.location.copy()
+            
+            def masked_falloff(mesh, mask):
+                return falloff_weights(owners[mesh.session_uid], mesh, mask, props, cursor_location)
+            
+            falloff = masked_falloff
+        
+        with mesh_data_mode(context) as selected_only:
+            count = assign_attribute_value(
+                meshes, name, data_type, domain, value, selected_only, create=True, falloff=falloff,
+            )
+        
+        self.report({'INFO'}, f"Assigned value on {count} meshes")
         return {'FINISHED'}
 
 class MESH_OT_attribute_remove(Operator):
     bl_idname = "mesh.attribute_remove"
     bl_label = "Remove"
-    bl_description = "Remove attribute value from selection (set to 0/False)"
+    bl_description = "Remove attribute value from the selection or the selected objects (set to 0/False)"
     bl_options = {'REGISTER', 'UNDO'}
     
     @classmethod
     def poll(cls, context):
-        if context.mode != 'EDIT_MESH' or not context.object or context.object.type != 'MESH':
+        if context.mode not in {'EDIT_MESH', 'OBJECT'} or not context.object or context.object.type != 'MESH':
             return False
-        mesh = context.object.data
         props = context.scene.attributes_panel_props
         
-        # Verifica che ci sia un attributo selezionato
-        if mesh.attributes.active_index < 0 or mesh.attributes.active_index >= len(mesh.attributes):
-            return False
-        
-        # Verifica che l'attributo selezionato sia visibile (non filtrato)
-        attr = mesh.attributes[mesh.attributes.active_index]
-        if not props.show_system_attributes:
-            if attr.name in SYSTEM_ATTRIBUTES or attr.name.startswith('.') or attr.name == 'UVMap' or attr.name.startswith('UVMap'):
-                return False
-        
-        return True
+        # Serve un attributo attivo visibile nella lista (non filtrato)
+        return is_active_attribute_visible(context.object.data, props.show_system_attributes)
     
     def execute(self, context):
-        obj = context.object
-        mesh = obj.data
-        
+        mesh = context.object.data
         attr = mesh.attributes[mesh.attributes.active_index]
         
-        # Imposta l'attributo attivo
-        mesh.attributes.active = attr
-        
-        # Usa l'operatore nativo per impostare a 0/False
-        if attr.data_type == 'BOOLEAN':
-            bpy.ops.mesh.attribute_set(value_bool=False)
-        elif attr.data_type == 'FLOAT':
-            bpy.ops.mesh.attribute_set(value_float=0.0)
-        elif attr.data_type == 'INT':
-            bpy.ops.mesh.attribute_set(value_int=0)
-        else:
+        if attr.data_type not in ATTRIBUTE_LAYOUTS:
             self.report({'WARNING'}, f"Data type {attr.data_type} not supported")
             return {'CANCELLED'}
         
-        self.report({'INFO'}, f"Removed value from selection")
+        name, data_type, domain = attr.name, attr.data_type, attr.domain
+        meshes = get_target_meshes(context)
+        
+        # Imposta a 0/False
+        with mesh_data_mode(context) as selected_only:
+            count = assign_attribute_value(meshes, name, data_type, domain, 0, selected_only)
+        
+        self.report({'INFO'}, f"Removed value on {count} meshes")
         return {'FINISHED'}
 
 class MESH_OT_attribute_select(Operator):
     bl_idname = "mesh.attribute_select"
     bl_label = "Select"
-    bl_description = "Select geometry with this attribute"
+    bl_description = "Select geometry with this attribute on every mesh being edited or selected"
     bl_options = {'REGISTER', 'UNDO'}
     
     @classmethod
     def poll(cls, context):
-        if context.mode != 'EDIT_MESH' or not context.object or context.object.type != 'MESH':
+        if context.mode not in {'EDIT_MESH', 'OBJECT'} or not context.object or context.object.type != 'MESH':
             return False
-        mesh = context.object.data
         props = context.scene.attributes_panel_props
         
-        # Verifica che ci sia un attributo selezionato
-        if mesh.attributes.active_index < 0 or mesh.attributes.active_index >= len(mesh.attributes):
-            return False
-        
-        # Verifica che l'attributo selezionato sia visibile (non filtrato)
-        attr = mesh.attributes[mesh.attributes.active_index]
-        if not props.show_system_attributes:
-            if attr.name in SYSTEM_ATTRIBUTES or attr.name.startswith('.') or attr.name == 'UVMap' or attr.name.startswith('UVMap'):
-                return False
-        
-        return True
+        # Serve un attributo attivo visibile nella lista (non filtrato)
+        return is_active_attribute_visible(context.object.data, props.show_system_attributes)
     
     def execute(self, context):
-        obj = context.object
-        mesh = obj.data
+        mesh = context.object.data
+        name = mesh.attributes[mesh.attributes.active_index].name
+        meshes = get_target_meshes(context)
         
-        attr = mesh.attributes[mesh.attributes.active_index]
-        
-        # Usa l'operatore nativo di Blender per selezionare
-        try:
-            # Prima imposta l'attributo attivo
-            mesh.attributes.active = attr
-            
-            # Poi usa select_by_attribute
-            bpy.ops.mesh.select_by_attribute()
-            
-            self.report({'INFO'}, f"Selected elements with attribute")
-        except Exception as e:
-            self.report({'ERROR'}, f"Error selecting: {str(e)}")
-            return {'CANCELLED'}
+        with mesh_data_mode(context):
+            count = select_by_attribute_value(meshes, name, select=True)
         
+        self.report({'INFO'}, f"Selected elements with attribute on {count} meshes")
         return {'FINISHED'}
 
 class MESH_OT_attribute_deselect(Operator):
     bl_idname = "mesh.attribute_deselect"
     bl_label = "Deselect"
-    bl_description = "Deselect geometry with this attribute"
+    bl_description = "Deselect geometry with this attribute on every mesh being edited or selected"
     bl_options = {'REGISTER', 'UNDO'}
     
     @classmethod
     def poll(cls, context):
-        if context.mode != 'EDIT_MESH' or not context.object or context.object.type != 'MESH':
+        if context.mode not in {'EDIT_MESH', 'OBJECT'} or not context.object or context.object.type != 'MESH':
             return False
-        mesh = context.object.data
         props = context.scene.attributes_panel_props
         
-        # Verifica che ci sia un attributo selezionato
-        if mesh.attributes.active_index < 0 or mesh.attributes.active_index >= len(mesh.attributes):
+        # Serve un attributo attivo visibile nella lista (non filtrato)
+        return is_active_attribute_visible(context.object.data, props.show_system_attributes)
+    
+    def execute(self, context):
+        mesh = context.object.data
+        name = mesh.attributes[mesh.attributes.active_index].name
+        meshes = get_target_meshes(context)
+        
+        with mesh_data_mode(context):
+            count = select_by_attribute_value(meshes, name, select=False)
+        
+        self.report({'INFO'}, f"Deselected elements with attribute on {count} meshes")
+        return {'FINISHED'}
+
+class MESH_OT_attribute_select_value(Operator):
+    bl_idname = "mesh.attribute_select_value"
+    bl_label = "Select by Value"
+    bl_description = "Select geometry whose attribute value passes a threshold or range test"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    compare: bpy.props.EnumProperty(
+        name="Compare",
+        items=COMPARE_ITEMS,
+        default='GREATER'
+    )
+    
+    threshold: FloatProperty(
+        name="Value",
+        default=0.5,
+        description="Threshold, or minimum of the range"
+    )
+    
+    threshold_max: FloatProperty(
+        name="Maximum",
+        default=1.0,
+        description="Maximum of the range"
+    )
+    
+    epsilon: FloatProperty(
+        name="Epsilon",
+        default=0.0001,
+        min=0.0,
+        precision=5,
+        description="Tolerance for the Equal comparison"
+    )
+    
+    component: bpy.props.EnumProperty(
+        name="Component",
+        description="Component compared for vector, color and quaternion attributes",
+        items=COMPONENT_ITEMS,
+        default='X'
+    )
+    
+    action: bpy.props.EnumProperty(
+        name="Action",
+        items=[
+            ('SET', "Set", "Replace the selection"),
+            ('ADD', "Add", "Add to the selection"),
+            ('SUBTRACT', "Subtract", "Remove from the selection"),
+        ],
+        default='SET'
+    )
+    
+    @classmethod
+    def poll(cls, context):
+        if context.mode not in {'EDIT_MESH', 'OBJECT'} or not context.object or context.object.type != 'MESH':
             return False
+        props = context.scene.attributes_panel_props
         
-        # Verifica che l'attributo selezionato sia visibile (non filtrato)
+        # Serve un attributo attivo visibile nella lista (non filtrato)
+        return is_active_attribute_visible(context.object.data, props.show_system_attributes)
+    
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False
+        
+        layout.prop(self, "compare")
+        col = layout.column(align=True)
+        col.prop(self, "threshold", text="Minimum" if self.compare == 'BETWEEN' else "Value")
+        if self.compare == 'BETWEEN':
+            col.prop(self, "threshold_max")
+        elif self.compare == 'EQUAL':
+            col.prop(self, "epsilon")
+        
+        mesh = context.object.data
+        attr = mesh.attributes[mesh.attributes.active_index]
+        if ATTRIBUTE_LAYOUTS.get(attr.data_type, (None, None, 1))[2] > 1:
+            layout.prop(self, "component")
+        layout.prop(self, "action", expand=True)
+    
+    def execute(self, context):
+        mesh = context.object.data
         attr = mesh.attributes[mesh.attributes.active_index]
-        if not props.show_system_attributes:
-            if attr.name in SYSTEM_ATTRIBUTES or attr.name.startswith('.') or attr.name == 'UVMap' or attr.name.startswith('UVMap'):
-                return False
         
-        return True
+        if attr.data_type not in ATTRIBUTE_LAYOUTS:
+            self.report({'WARNING'}, f"Data type {attr.data_type} not supported")
+            return {'CANCELLED'}
+        
+        name, data_type = attr.name, attr.data_type
+        meshes = get_target_meshes(context)
+        
+        with mesh_data_mode(context):
+            count = select_by_attribute_range(
+                meshes, name, self.component, self.compare,
+                self.threshold, self.threshold_max, self.epsilon, self.action,
+            )
+        
+        if count == 0:
+            self.report({'WARNING'}, f"Component {self.component} not available for {data_type}")
+            return {'CANCELLED'}
+        
+        self.report({'INFO'}, f"Selected elements by value on {count} meshes")
+        return {'FINISHED'}
+
+class MESH_OT_attribute_expression(Operator):
+    bl_idname = "mesh.attribute_expression"
+    bl_label = "Compute Attribute"
+    bl_description = "Compute an attribute from an expression over other attributes, on every mesh being edited or selected"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    expression: StringProperty(
+        name="Expression",
+        default="position.z > 0",
+        description="e.g. position.z > 0 and Wear > 0.3, curve(AO, 0, 0, 0.5, 1), "
+                    "mix(Color, vec(1, 0, 0, 1), selection). "
+                    "Built-ins: position, normal, area, selection, index"
+    )
+    
+    target: StringProperty(
+        name="Result",
+        default="Mask",
+        description="Attribute to write; created if missing"
+    )
+    
+    domain: bpy.props.EnumProperty(
+        name="Domain",
+        items=[
+            ('POINT', "Vertex", "Evaluate per vertex"),
+            ('EDGE', "Edge", "Evaluate per edge"),
+            ('FACE', "Face", "Evaluate per face"),
+            ('CORNER', "Face Corner", "Evaluate per face corner"),
+        ],
+        default='POINT'
+    )
+    
+    data_type: bpy.props.EnumProperty(
+        name="Data Type",
+        description="Type of the attribute when it has to be created",
+        items=[
+            ('AUTO', "Auto", "Boolean for conditions, float or vector otherwise"),
+            ('BOOLEAN', "Boolean", "True or False"),
+            ('FLOAT', "Float", "Floating point value"),
+            ('INT', "Integer", "Integer value"),
+            ('FLOAT_VECTOR', "Vector", "3D vector"),
+            ('FLOAT_COLOR', "Color", "RGBA color"),
+        ],
+        default='AUTO'
+    )
+    
+    @classmethod
+    def poll(cls, context):
+        return (context.mode in {'EDIT_MESH', 'OBJECT'} and context.object
+                and context.object.type == 'MESH')
+    
+    def invoke(self, context, event):
+        # Se esiste già, il risultato va nel dominio dell'attributo
+        mesh = context.object.data
+        attr = mesh.attributes.get(self.target)
+        if attr is not None and attr.domain in {'POINT', 'EDGE', 'FACE', 'CORNER'}:
+            self.domain = attr.domain
+        return context.window_manager.invoke_props_dialog(self, width=400)
     
     def execute(self, context):
-        obj = context.object
-        mesh = obj.data
+        if not self.target:
+            self.report({'WARNING'}, "Result attribute name is empty")
+            return {'CANCELLED'}
         
-        attr = mesh.attributes[mesh.attributes.active_index]
+        meshes = get_target_meshes(context)
+        count = 0
+        errors = []
+        
+        with mesh_data_mode(context):
+            for mesh in meshes:
+                try:
+                    result = evaluate_expression(mesh, self.expression, self.domain)
+                    store_result(mesh, self.target, self.domain, result, self.data_type)
+                except (ValueError, TypeError, IndexError) as e:
+                    errors.append(f"{mesh.name}: {e}")
+                    continue
+                mesh.update()
+                count += 1
+        
+        if count == 0:
+            self.report({'ERROR'}, errors[0] if errors else "No mesh to evaluate")
+            return {'CANCELLED'}
+        if errors:
+            self.report({'WARNING'}, f"Computed {self.target} on {count} meshes, skipped {len(errors)}. {errors[0]}")
+        else:
+            self.report({'INFO'}, f"Computed {self.target} on {count} meshes")
+        return {'FINISHED'}
+
+class MESH_OT_attribute_export(Operator, ExportHelper):
+    bl_idname = "mesh.attribute_export"
+    bl_label = "Export Attributes"
+    bl_description = "Export attributes of the active or selected meshes to .npz, or to .npy files with a .json manifest"
+    bl_options = {'REGISTER'}
+    
+    filename_ext = ".npz"
+    
+    filter_glob: StringProperty(default="*.npz;*.json", options={'HIDDEN'})
+    
+    file_format: bpy.props.EnumProperty(
+        name="Format",
+        items=[
+            ('NPZ', "NPZ Archive", "One uncompressed .npz file"),
+            ('NPY', "NPY Files", "One .npy file per attribute plus a .json manifest (memory-mapped on import)"),
+        ],
+        default='NPZ'
+    )
+    
+    attributes: bpy.props.EnumProperty(
+        name="Attributes",
+        items=[
+            ('ACTIVE', "Active", "Only the active attribute"),
+            ('VISIBLE', "Visible", "Every attribute shown in the list"),
+            ('ALL', "All", "Every attribute, system attributes included"),
+        ],
+        default='ACTIVE'
+    )
+    
+    @classmethod
+    def poll(cls, context):
+        return (context.mode in {'EDIT_MESH', 'OBJECT'} and context.object
+                and context.object.type == 'MESH')
+    
+    def attribute_names(self, context, mesh):
+        if self.attributes == 'ACTIVE':
+            active = context.object.data.attributes.active
+            return [active.name] if active else []
+        if self.attributes == 'VISIBLE':
+            return visible_attribute_names(mesh)
+        return list(mesh.attributes.keys())
+    
+    def execute(self, context):
+        filepath = self.filepath
+        if self.file_format == 'NPY':
+            filepath = os.path.splitext(filepath)[0] + ".json"
+        
+        objects = get_target_objects(context)
+        with mesh_data_mode(context):
+            targets = [(obj.name, obj.data, self.attribute_names(context, obj.data)) for obj in objects]
+            try:
+                count = export_attributes(filepath, targets)
+            except OSError as e:
+                self.report({'ERROR'}, f"Cannot write {filepath}: {e}")
+                return {'CANCELLED'}
+        
+        if count == 0:
+            self.report({'WARNING'}, "No supported attribute to export")
+            return {'CANCELLED'}
+        
+        self.report({'INFO'}, f"Exported {count} attributes from {len(objects)} meshes")
+        return {'FINISHED'}
+
+class MESH_OT_attribute_import(Operator, ImportHelper):
+    bl_idname = "mesh.attribute_import"
+    bl_label = "Import Attributes"
+    bl_description = "Import attributes exported to .npz or .npy/.json onto the active or selected meshes with the same topology"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    filter_glob: StringProperty(default="*.npz;*.json", options={'HIDDEN'})
+    
+    strict_topology: BoolProperty(
+        name="Strict Topology",
+        default=True,
+        description="Require the same connectivity, not only the same element counts"
+    )
+    
+    @classmethod
+    def poll(cls, context):
+        return (context.mode in {'EDIT_MESH', 'OBJECT'} and context.object
+                and context.object.type == 'MESH')
+    
+    def execute(self, context):
+        objects = get_target_objects(context)
+        count = 0
+        skipped = []
         
-        # Usa l'operatore nativo di Blender per deselezionare
         try:
-            # Prima imposta l'attributo attivo
-            mesh.attributes.active = attr
-            
-            # Salva la selezione corrente
-            bpy.ops.mesh.select_all(action='INVERT')
-            
-            # Seleziona gli elementi con attributo
-            bpy.ops.mesh.select_by_attribute()
-            
-            # Poi inverti la selezione per deselezionare
-            bpy.ops.mesh.select_all(action='INVERT')
-            
-            self.report({'INFO'}, f"Deselected elements with attribute")
-        except Exception as e:
-            self.report({'ERROR'}, f"Error deselecting: {str(e)}")
+            archive = AttributeArchive(self.filepath)
+        except (OSError, ValueError, KeyError) as e:
+            self.report({'ERROR'}, f"Cannot read {self.filepath}: {e}")
+            return {'CANCELLED'}
+        
+        with archive, mesh_data_mode(context):
+            for obj in objects:
+                mesh = obj.data
+                entry = archive.find_entry(obj.name, mesh.name)
+                if entry is None and len(objects) == 1 and len(archive.meshes) == 1:
+                    # Un solo oggetto e una sola mesh esportata: nomi liberi
+                    entry = archive.meshes[0]
+                if entry is None:
+                    skipped.append(f"{obj.name}: not in file")
+                    continue
+                
+                reason = check_topology(mesh, entry, self.strict_topology)
+                if reason is None:
+                    try:
+                        count += import_entry(mesh, archive, entry)
+                        continue
+                    except ValueError as e:
+                        reason = str(e)
+                skipped.append(f"{obj.name}: {reason}")
+        
+        if count == 0:
+            self.report({'ERROR'}, skipped[0] if skipped else "Nothing to import")
+            return {'CANCELLED'}
+        if skipped:
+            self.report({'WARNING'}, f"Imported {count} attributes, skipped {len(skipped)} meshes. {skipped[0]}")
+        else:
+            self.report({'INFO'}, f"Imported {count} attributes")
+        return {'FINISHED'}
+
+class MESH_OT_attribute_transfer(Operator):
+    bl_idname = "mesh.attribute_transfer"
+    bl_label = "Transfer Attributes"
+    bl_description = "Transfer attributes from the active mesh to the other selected meshes by nearest surface"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    attributes: bpy.props.EnumProperty(
+        name="Attributes",
+        items=[
+            ('ACTIVE', "Active", "Only the active attribute"),
+            ('VISIBLE', "Visible", "Every attribute shown in the list"),
+        ],
+        default='ACTIVE'
+    )
+    
+    mapping: bpy.props.EnumProperty(
+        name="Mapping",
+        items=[
+            ('INTERPOLATED', "Interpolated", "Blend the values of the nearest triangle barycentrically"),
+            ('NEAREST', "Nearest", "Value of the nearest vertex or corner of the nearest triangle"),
+        ],
+        default='INTERPOLATED'
+    )
+    
+    max_distance: FloatProperty(
+        name="Max Distance",
+        default=0.0,
+        min=0.0,
+        subtype='DISTANCE',
+        description="Elements farther than this from the source keep their value (0 for no limit)"
+    )
+    
+    @classmethod
+    def poll(cls, context):
+        if context.mode != 'OBJECT' or not context.object or context.object.type != 'MESH':
+            return False
+        return any(obj.type == 'MESH' and obj != context.object for obj in context.selected_objects)
+    
+    def execute(self, context):
+        source = context.object
+        mesh = source.data
+        
+        if self.attributes == 'ACTIVE':
+            active = mesh.attributes.active
+            names = [active.name] if active else []
+        else:
+            names = visible_attribute_names(mesh)
+        if not names:
+            self.report({'WARNING'}, "No attribute to transfer")
+            return {'CANCELLED'}
+        
+        count = 0
+        targets = [obj for obj in get_target_objects(context) if obj.data != mesh]
+        for target in targets:
+            try:
+                count += transfer_attributes(source, target, names, self.mapping == 'INTERPOLATED', self.max_distance)
+            except ValueError as e:
+                self.report({'ERROR'}, str(e))
+                return {'CANCELLED'}
+        
+        if count == 0:
+            self.report({'WARNING'}, "No supported attribute transferred")
             return {'CANCELLED'}
         
+        self.report({'INFO'}, f"Transferred {count} attributes to {len(targets)} meshes")
         return {'FINISHED'}
 
 class MESH_OT_add_vertex_attribute(Operator):
@@ -611,6 +1097,8 @@ def draw(self, context):
         op.domain = 'EDGE'
         op = layout.operator("mesh.attribute_convert", text="Face")
         op.domain = 'FACE'
+        op = layout.operator("mesh.attribute_convert", text="Face Corner")
+        op.domain = 'CORNER'
 
 
 
@@ -625,6 +1113,11 @@ def draw(self, context):
     MESH_OT_attribute_remove,
     MESH_OT_attribute_select,
     MESH_OT_attribute_deselect,
+    MESH_OT_attribute_select_value,
+    MESH_OT_attribute_expression,
+    MESH_OT_attribute_export,
+    MESH_OT_attribute_import,
+    MESH_OT_attribute_transfer,
     MESH_OT_add_vertex_attribute,
     MESH_OT_add_edge_attribute,
     MESH_OT_add_face_attribute,
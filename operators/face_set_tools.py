@@ -0,0 +1,160 @@
+import bpy
+import math
+from bpy.types import Operator
+import numpy as np
+from .attribute_selection import read_hidden, read_selection, write_selection
+from .attributes_manager import get_target_meshes, mesh_data_mode
+from .face_sets import (EDIT_ITEMS, GENERATE_ITEMS, face_set_boundary, generate_face_sets,
+                        grow_face_sets, merge_small_face_sets, read_face_sets,
+                        shrink_face_sets, write_face_sets)
+from .mesh_topology import get_topology
+
+
+class MESH_OT_face_sets_generate(Operator):
+    """Create Face Sets from UV islands, materials, seams, sharp edges, normals or loose parts"""
+    bl_idname = "mesh.face_sets_generate"
+    bl_label = "Generate Face Sets"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    source: bpy.props.EnumProperty(
+        name="From",
+        items=GENERATE_ITEMS,
+        default='LOOSE'
+    )
+
+    angle: bpy.props.FloatProperty(
+        name="Angle",
+        description="Maximum angle between neighbouring faces of the same Face Set",
+        default=math.radians(30.0),
+        min=0.0,
+        max=math.pi,
+        subtype='ANGLE'
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return (context.mode in {'EDIT_MESH', 'OBJECT'} and context.object
+                and context.object.type == 'MESH')
+
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.prop(self, "source")
+        if self.source == 'NORMALS':
+            layout.prop(self, "angle")
+
+    def execute(self, context):
+        meshes = get_target_meshes(context)
+        total = 0
+
+        # Una sola uscita da Edit Mode per tutte le mesh
+        with mesh_data_mode(context):
+            for mesh in meshes:
+                face_sets = generate_face_sets(mesh, self.source, self.angle)
+                write_face_sets(mesh, face_sets)
+                if len(face_sets):
+                    total += int(face_sets.max())
+
+        self.report({'INFO'}, f"Created {total} Face Sets on {len(meshes)} meshes")
+        return {'FINISHED'}
+
+
+class MESH_OT_face_set_edit(Operator):
+    """Grow, shrink or select the boundary of the Face Sets of the selected faces, or merge small Face Sets"""
+    bl_idname = "mesh.face_set_edit"
+    bl_label = "Edit Face Sets"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    mode: bpy.props.EnumProperty(
+        name="Mode",
+        items=EDIT_ITEMS,
+        default='GROW'
+    )
+
+    rings: bpy.props.IntProperty(
+        name="Rings",
+        description="Number of face rings to add or remove",
+        default=1,
+        min=1,
+        soft_max=32
+    )
+
+    min_faces: bpy.props.IntProperty(
+        name="Minimum Faces",
+        description="Face Sets with fewer faces are merged into a neighbour",
+        default=10,
+        min=2,
+        soft_max=1000
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return (context.mode == 'EDIT_MESH' and context.object
+                and context.object.type == 'MESH')
+
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.prop(self, "mode")
+        if self.mode in {'GROW', 'SHRINK'}:
+            layout.prop(self, "rings")
+        elif self.mode == 'MERGE_SMALL':
+            layout.prop(self, "min_faces")
+
+    def edit_mesh(self, mesh):
+        """Applica la modifica a una mesh (Object Mode). Restituisce True se
+        la mesh aveva Face Set su cui lavorare."""
+        face_sets = read_face_sets(mesh)
+        if face_sets is None or not len(face_sets):
+            return False
+        topology = get_topology(mesh)
+
+        if self.mode == 'MERGE_SMALL':
+            write_face_sets(mesh, merge_small_face_sets(topology, face_sets, self.min_faces))
+            return True
+
+        # Face Set su cui lavorare: quelli delle facce selezionate
+        face_set_ids = np.unique(face_sets[read_selection(mesh, 'FACE')])
+        if not len(face_set_ids):
+            return False
+
+        if self.mode == 'BOUNDARY':
+            write_selection(mesh, 'EDGE', face_set_boundary(topology, face_sets, face_set_ids))
+            return True
+
+        hidden = read_hidden(mesh, 'FACE')
+        if self.mode == 'GROW':
+            face_sets = grow_face_sets(topology, face_sets, face_set_ids, self.rings, hidden)
+        else:
+            face_sets = shrink_face_sets(topology, face_sets, face_set_ids, self.rings, hidden)
+        write_face_sets(mesh, face_sets)
+
+        # La selezione segue i Face Set modificati
+        write_selection(mesh, 'FACE', np.isin(face_sets, face_set_ids))
+        return True
+
+    def execute(self, context):
+        meshes = get_target_meshes(context)
+
+        # Una sola uscita da Edit Mode per tutte le mesh
+        with mesh_data_mode(context):
+            edited = sum(self.edit_mesh(mesh) for mesh in meshes)
+
+        if not edited:
+            self.report({'WARNING'}, "No Face Sets in the selected faces")
+            return {'CANCELLED'}
+        return {'FINISHED'}
+
+
+classes = (
+    MESH_OT_face_sets_generate,
+    MESH_OT_face_set_edit,
+)
+
+def face_set_tools_register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+def face_set_tools_unregister():
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
@@ -0,0 +1,343 @@
+import bpy
+import numpy as np
+import zlib
+from collections import OrderedDict
+from bpy.app.handlers import persistent
+from .attribute_domains import read_attribute
+from .mesh_cache import geometry_generation, touch_attributes
+from .mesh_topology import build_adjacency, gather_adjacency, get_topology
+
+
+# Attributo con l'id del Face Set di ogni faccia
+FACE_SET_ATTRIBUTE = '.sculpt_face_set'
+
+# Origini dei Face Set generati
+GENERATE_ITEMS = [
+    ('LOOSE', "Loose Parts", "One Face Set per connected part"),
+    ('MATERIAL', "Materials", "One Face Set per material slot"),
+    ('UV', "UV Islands", "One Face Set per UV island of the active UV map"),
+    ('SEAM', "Seams", "Regions delimited by UV seams"),
+    ('SHARP', "Sharp Edges", "Regions delimited by sharp edges"),
+    ('NORMALS', "Normals", "Regions whose neighbouring faces bend less than the angle"),
+]
+
+# Tolleranza per considerare uguali due coordinate UV
+UV_EPSILON = 1e-5
+
+# Numero massimo di indici tenuti in cache
+MAX_CACHED_INDICES = 8
+
+# session_uid -> (generazione, fingerprint, FaceSetIndex), dal meno al più recente
+_index_cache = OrderedDict()
+
+
+class FaceSetIndex:
+    """Indice invertito id del Face Set -> facce (indici ordinati), in CSR.
+
+    Le facce del Face Set ids[i] sono faces[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, face_sets):
+        self.ids, inverse = np.unique(face_sets, return_inverse=True)
+        adjacency = build_adjacency(inverse, np.arange(len(face_sets), dtype=np.int32), len(self.ids))
+        self.offsets, self.faces = adjacency
+
+    def faces_of(self, face_set_ids):
+        """Facce dei Face Set indicati (gli id inesistenti vengono ignorati)"""
+        face_set_ids = np.atleast_1d(face_set_ids)
+        slots = np.searchsorted(self.ids, face_set_ids)
+        valid = slots < len(self.ids)
+        slots = slots[valid][self.ids[slots[valid]] == face_set_ids[valid]]
+        if not len(slots):
+            return self.faces[:0]
+        return np.concatenate([self.faces[self.offsets[s]:self.offsets[s + 1]] for s in slots])
+
+
+def read_face_sets(mesh):
+    """Id del Face Set di ogni faccia (dati della mesh), None se non ci sono Face Set"""
+    attr = mesh.attributes.get(FACE_SET_ATTRIBUTE)
+    if attr is None:
+        return None
+    face_sets = np.empty(len(mesh.polygons), dtype=np.int32)
+    attr.data.foreach_get("value", face_sets)
+    return face_sets
+
+def read_bmesh_face_sets(bm):
+    """Id del Face Set di ogni faccia della BMesh di Edit Mode, None se non
+    ci sono Face Set. Legge il layer senza update_from_editmode."""
+    layer = bm.faces.layers.int.get(FACE_SET_ATTRIBUTE)
+    if layer is None:
+        return None
+    return np.fromiter((face[layer] for face in bm.faces), dtype=np.int32, count=len(bm.faces))
+
+def _element_counts(obj, bm=None):
+    if bm is not None:
+        return len(bm.verts), len(bm.edges), len(bm.faces)
+    mesh = obj.data
+    return len(mesh.vertices), len(mesh.edges), len(mesh.polygons)
+
+def get_face_set_index(obj, bm=None):
+    """FaceSetIndex della mesh dell'oggetto, None se non ha Face Set.
+
+    In Edit Mode va passata la BMesh di bmesh.from_edit_mesh. Se la
+    geometria non è cambiata (generazione della mesh_cache) e il numero di
+    elementi è lo stesso, l'indice in cache viene restituito senza leggere
+    nulla. Altrimenti si rilegge .sculpt_face_set e l'indice viene
+    ricostruito solo se il suo hash (CRC più numero di elementi) è cambiato.
+    """
+    mesh = obj.data
+    uid = mesh.session_uid
+    generation = geometry_generation(mesh)
+    counts = _element_counts(obj, bm)
+    cached = _index_cache.get(uid)
+
+    if cached is not None:
+        cached_generation, fingerprint, index = cached
+        if cached_generation == generation and fingerprint[:3] == counts:
+            _index_cache.move_to_end(uid)
+            return index
+
+    face_sets = read_face_sets(mesh) if bm is None else read_bmesh_face_sets(bm)
+    if face_sets is None:
+        _index_cache.pop(uid, None)
+        return None
+
+    fingerprint = counts + (zlib.crc32(face_sets),)
+    if cached is not None and cached[1] == fingerprint:
+        index = cached[2]
+    else:
+        index = FaceSetIndex(face_sets)
+
+    _index_cache[uid] = (generation, fingerprint, index)
+    _index_cache.move_to_end(uid)
+    while len(_index_cache) > MAX_CACHED_INDICES:
+        _index_cache.popitem(last=False)
+    return index
+
+def invalidate_face_set_index(mesh=None):
+    """Elimina l'indice in cache di una mesh, o di tutte se mesh è None"""
+    if mesh is None:
+        _index_cache.clear()
+    else:
+        _index_cache.pop(mesh.session_uid, None)
+
+
+# =============================================================================
+# GENERAZIONE
+# =============================================================================
+
+def connected_components(count, a, b):
+    """Etichetta 0..k-1 della componente connessa di ogni nodo.
+
+    a, b: array degli archi (nodo, nodo). Union-find vettoriale: ad ogni
+    passata la radice maggiore di ogni arco si aggancia alla minore, poi
+    i puntatori vengono compressi fino alle radici. Le radici puntano
+    sempre a indici minori, quindi non si formano cicli.
+    """
+    parent = np.arange(count, dtype=np.int64)
+    while True:
+        root_a, root_b = parent[a], parent[b]
+        differ = root_a != root_b
+        if not differ.any():
+            break
+        low = np.minimum(root_a[differ], root_b[differ])
+        high = np.maximum(root_a[differ], root_b[differ])
+        np.minimum.at(parent, high, low)
+
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+    return np.unique(parent, return_inverse=True)[1]
+
+def _edge_flags(mesh, prop):
+    flags = np.empty(len(mesh.edges), dtype=bool)
+    mesh.edges.foreach_get(prop, flags)
+    return flags
+
+def _uv_continuous(mesh, topology, corner_a, corner_b):
+    """Coppie di facce con le stesse UV sui due vertici dell'edge in comune"""
+    uv_layer = mesh.uv_layers.active
+    if uv_layer is None:
+        return np.ones(len(corner_a), dtype=bool)
+    uv = read_attribute(mesh.attributes[uv_layer.name])
+
+    following = topology.next_corner
+    same_direction = topology.corner_vert[corner_a] == topology.corner_vert[corner_b]
+    b_start = np.where(same_direction, corner_b, following[corner_b])
+    b_end = np.where(same_direction, following[corner_b], corner_b)
+
+    start_match = np.all(np.abs(uv[corner_a] - uv[b_start]) <= UV_EPSILON, axis=1)
+    end_match = np.all(np.abs(uv[following[corner_a]] - uv[b_end]) <= UV_EPSILON, axis=1)
+    return start_match & end_match
+
+def generate_face_sets(mesh, source, angle=0.5236):
+    """Id dei Face Set (da 1) per ogni faccia, generati da source (GENERATE_ITEMS).
+
+    Le regioni sono le componenti connesse delle facce attraverso gli edge
+    non delimitati; angle (radianti) serve per NORMALS. La mesh deve
+    essere in Object Mode.
+    """
+    topology = get_topology(mesh)
+
+    if source == 'MATERIAL':
+        materials = np.empty(topology.face_count, dtype=np.int32)
+        mesh.polygons.foreach_get("material_index", materials)
+        return np.unique(materials, return_inverse=True)[1].astype(np.int32) + 1
+
+    edges, corner_a, corner_b = topology.face_pairs
+    face_a = topology.corner_face[corner_a]
+    face_b = topology.corner_face[corner_b]
+
+    if source == 'SEAM':
+        linked = ~_edge_flags(mesh, "use_seam")[edges]
+    elif source == 'SHARP':
+        linked = ~_edge_flags(mesh, "use_edge_sharp")[edges]
+    elif source == 'UV':
+        linked = _uv_continuous(mesh, topology, corner_a, corner_b)
+    elif source == 'NORMALS':
+        normals = np.empty(topology.face_count * 3, dtype=np.float32)
+        mesh.polygon_normals.foreach_get("vector", normals)
+        normals = normals.reshape(-1, 3)
+        cosines = np.einsum('ij,ij->i', normals[face_a], normals[face_b])
+        linked = cosines >= np.cos(angle)
+    else:
+        linked = np.ones(len(edges), dtype=bool)
+
+    labels = connected_components(topology.face_count, face_a[linked], face_b[linked])
+    return labels.astype(np.int32) + 1
+
+def write_face_sets(mesh, face_sets):
+    """Scrive gli id dei Face Set (un foreach_set), creando l'attributo se
+    manca, e aggiorna la mesh per modificatori e viewport"""
+    attr = mesh.attributes.get(FACE_SET_ATTRIBUTE)
+    if attr is None or attr.data_type != 'INT' or attr.domain != 'FACE':
+        if attr is not None:
+            mesh.attributes.remove(attr)
+        mesh.attributes.new(name=FACE_SET_ATTRIBUTE, type='INT', domain='FACE')
+        attr = mesh.attributes[FACE_SET_ATTRIBUTE]
+    attr.data.foreach_set("value", np.ascontiguousarray(face_sets, dtype=np.int32))
+    touch_attributes(mesh)
+    invalidate_face_set_index(mesh)
+    mesh.update()
+
+
+# =============================================================================
+# MODIFICA
+# =============================================================================
+
+EDIT_ITEMS = [
+    ('GROW', "Grow", "Extend the Face Sets of the selected faces by rings of neighbouring faces"),
+    ('SHRINK', "Shrink", "Give the border rings of the Face Sets of the selected faces to their neighbours"),
+    ('BOUNDARY', "Select Boundary", "Select the border edges of the Face Sets of the selected faces"),
+    ('MERGE_SMALL', "Merge Small", "Merge Face Sets with fewer faces than the minimum into their largest neighbour"),
+]
+
+def grow_face_sets(topology, face_sets, face_set_ids, rings, hidden=None):
+    """Allarga i Face Set indicati di rings anelli di facce adiacenti.
+
+    Espansione a fronte sulla CSR face_faces: ogni anello visita solo i
+    vicini del fronte precedente. Le facce nascoste restano invariate.
+    Restituisce i nuovi id.
+    """
+    face_sets = face_sets.copy()
+    member = np.isin(face_sets, face_set_ids)
+    blocked = member.copy() if hidden is None else member | hidden
+    frontier = np.flatnonzero(member)
+
+    for _ in range(rings):
+        sources, neighbours = gather_adjacency(topology.face_faces, frontier)
+        new = ~blocked[neighbours]
+        if not new.any():
+            break
+        sources, neighbours = sources[new], neighbours[new]
+        face_sets[neighbours] = face_sets[sources]
+        blocked[neighbours] = True
+        frontier = np.unique(neighbours)
+    return face_sets
+
+def shrink_face_sets(topology, face_sets, face_set_ids, rings, hidden=None):
+    """Restringe i Face Set indicati di rings anelli.
+
+    Le facce sul bordo prendono l'id di un vicino esterno; dal secondo
+    anello si visitano solo i vicini delle facce appena cedute.
+    Restituisce i nuovi id.
+    """
+    face_sets = face_sets.copy()
+    member = np.isin(face_sets, face_set_ids)
+    if hidden is not None:
+        member &= ~hidden
+
+    _edges, corner_a, corner_b = topology.face_pairs
+    face_a = topology.corner_face[corner_a]
+    face_b = topology.corner_face[corner_b]
+    cross = member[face_a] != member[face_b]
+    inside = np.where(member[face_a], face_a, face_b)[cross]
+    outside = np.where(member[face_a], face_b, face_a)[cross]
+
+    for ring in range(rings):
+        if ring:
+            outside, inside = gather_adjacency(topology.face_faces, released)
+            keep = member[inside]
+            inside, outside = inside[keep], outside[keep]
+        if not len(inside):
+            break
+        face_sets[inside] = face_sets[outside]
+        member[inside] = False
+        released = np.unique(inside)
+    return face_sets
+
+def face_set_boundary(topology, face_sets, face_set_ids):
+    """Maschera degli edge sul bordo dei Face Set indicati (anche i bordi aperti)"""
+    member = np.isin(face_sets, face_set_ids)
+    inside = np.bincount(topology.corner_edge, weights=member[topology.corner_face], minlength=topology.edge_count)
+    total = np.bincount(topology.corner_edge, minlength=topology.edge_count)
+    return (inside > 0) & ((inside < total) | (total == 1))
+
+def merge_small_face_sets(topology, face_sets, min_faces, max_passes=16):
+    """Unisce i Face Set con meno di min_faces facce al vicino con cui
+    condividono più edge.
+
+    Un Face Set si unisce solo a un vicino più grande (a parità di facce,
+    con id maggiore), così non si creano scambi; le catene si risolvono
+    nelle passate successive. Restituisce i nuovi id.
+    """
+    face_sets = face_sets.copy()
+    _edges, corner_a, corner_b = topology.face_pairs
+    face_a = np.concatenate((topology.corner_face[corner_a], topology.corner_face[corner_b]))
+    face_b = np.concatenate((topology.corner_face[corner_b], topology.corner_face[corner_a]))
+
+    for _ in range(max_passes):
+        ids, inverse, sizes = np.unique(face_sets, return_inverse=True, return_counts=True)
+        slot_a, slot_b = inverse[face_a], inverse[face_b]
+        size_a, size_b = sizes[slot_a], sizes[slot_b]
+        candidate = (size_a < min_faces) & ((size_b > size_a) | ((size_b == size_a) & (slot_b > slot_a)))
+        if not candidate.any():
+            break
+
+        # Edge condivisi per ogni coppia (piccolo, vicino): vince il vicino con più edge
+        pairs, shared = np.unique(np.stack((slot_a[candidate], slot_b[candidate]), axis=1), axis=0, return_counts=True)
+        order = np.lexsort((-shared, pairs[:, 0]))
+        pairs = pairs[order]
+        first = np.ones(len(pairs), dtype=bool)
+        first[1:] = pairs[1:, 0] != pairs[:-1, 0]
+
+        target = np.arange(len(ids))
+        target[pairs[first, 0]] = pairs[first, 1]
+        face_sets = ids[target][inverse].astype(face_sets.dtype)
+    return face_sets
+
+
+@persistent
+def _face_sets_load_post(dummy):
+    _index_cache.clear()
+
+
+def face_sets_register():
+    bpy.app.handlers.load_post.append(_face_sets_load_post)
+
+def face_sets_unregister():
+    if _face_sets_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_face_sets_load_post)
+    _index_cache.clear()
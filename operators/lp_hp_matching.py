@@ -0,0 +1,789 @@
+import bpy
+import hashlib
+import heapq
+import numpy as np
+import re
+from collections import namedtuple
+from functools import lru_cache
+from mathutils import Vector
+from mathutils.bvhtree import BVHTree
+from mathutils.kdtree import KDTree
+
+from bpy.props import CollectionProperty, FloatProperty, PointerProperty, StringProperty
+
+from .mesh_cache import get_cached, get_mesh_metrics, geometry_generation, object_generation
+
+
+# =============================================================================
+# DATI PER OGGETTO (calcolati una sola volta)
+# =============================================================================
+
+def get_object_centers(objects):
+    """Centri della bounding box in coordinate mondo, come array (N, 3)"""
+    centers = np.empty((len(objects), 3))
+    for i, obj in enumerate(objects):
+        bbox = obj.bound_box
+        local_center = (Vector(bbox[0]) + Vector(bbox[6])) / 2
+        centers[i] = obj.matrix_world @ local_center
+    return centers
+
+def get_object_volumes(objects):
+    """Volumi delle bounding box in scala mondo (dalla cache delle metriche)"""
+    volumes = np.empty(len(objects))
+    for i, obj in enumerate(objects):
+        metrics = get_mesh_metrics(obj.data)
+        volumes[i] = metrics.volume * abs(obj.matrix_world.to_3x3().determinant())
+    return volumes
+
+def get_vertex_counts(objects):
+    """Numero di vertici di ogni mesh (dalla cache delle metriche)"""
+    return np.array(
+        [get_mesh_metrics(obj.data).vertex_count if obj.type == 'MESH' else 0 for obj in objects],
+        dtype=np.int64,
+    )
+
+def build_kdtree(points):
+    """Costruisce un KD-tree bilanciato su un array di punti (N, 3)"""
+    tree = KDTree(len(points))
+    for i, co in enumerate(points):
+        tree.insert(co, i)
+    tree.balance()
+    return tree
+
+@lru_cache(maxsize=None)
+def _suffix_pattern(suffix):
+    return re.compile(rf'{re.escape(suffix)}$', flags=re.IGNORECASE)
+
+def strip_suffix(name, suffix):
+    """Rimuove il suffisso (case insensitive) dalla fine del nome"""
+    return _suffix_pattern(suffix).sub('', name)
+
+def normalized_base_name(name, suffix):
+    """Nome base senza suffisso e in minuscolo, usato come chiave per il confronto"""
+    return strip_suffix(name, suffix).casefold()
+
+
+# =============================================================================
+# DESCRITTORI DI FORMA
+# =============================================================================
+
+# Bin dell'istogramma delle normali per ciascun asse principale
+NORMAL_HISTOGRAM_BINS = 4
+
+# Numero di vicini nello spazio dei descrittori valutati per ogni LP
+DESCRIPTOR_NEIGHBOURS = 8
+
+# Descrittore in spazio locale: estensioni della bounding box, momenti principali
+# (autovalori della covarianza pesata per area), area della superficie e
+# istogramma delle normali rispetto agli assi principali
+ShapeDescriptor = namedtuple("ShapeDescriptor", ("extents", "moments", "area", "normal_histogram"))
+
+def _compute_shape_descriptor(mesh):
+    histogram_size = 3 * NORMAL_HISTOGRAM_BINS
+    mesh.calc_loop_triangles()
+    vertex_count = len(mesh.vertices)
+    triangle_count = len(mesh.loop_triangles)
+    if vertex_count == 0 or triangle_count == 0:
+        return ShapeDescriptor(np.zeros(3), np.zeros(3), 0.0, np.zeros(histogram_size))
+
+    co = np.empty(vertex_count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co.shape = (vertex_count, 3)
+
+    triangles = np.empty(triangle_count * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", triangles)
+    triangles.shape = (triangle_count, 3)
+
+    a = co[triangles[:, 0]]
+    b = co[triangles[:, 1]]
+    c = co[triangles[:, 2]]
+    cross = np.cross(b - a, c - a).astype(np.float64)
+    double_areas = np.linalg.norm(cross, axis=1)
+    total_area = 0.5 * double_areas.sum()
+    extents = (co.max(axis=0) - co.min(axis=0)).astype(np.float64)
+    if total_area <= 0.0:
+        return ShapeDescriptor(extents, np.zeros(3), 0.0, np.zeros(histogram_size))
+
+    # Statistiche pesate per area: indipendenti dalla densità della mesh
+    weights = double_areas / double_areas.sum()
+    centroids = (a + b + c).astype(np.float64) / 3.0
+    mean = weights @ centroids
+    offsets = centroids - mean
+    covariance = (offsets * weights[:, None]).T @ offsets
+    moments, axes = np.linalg.eigh(covariance)
+    moments = np.maximum(moments[::-1], 0.0)
+    axes = axes[:, ::-1]
+
+    # Istogramma di |n . asse| per ogni asse principale (invariante per rotazione)
+    valid = double_areas > 0
+    normals = cross[valid] / double_areas[valid, None]
+    alignment = np.abs(normals @ axes)
+    bins = np.minimum((alignment * NORMAL_HISTOGRAM_BINS).astype(np.int64), NORMAL_HISTOGRAM_BINS - 1)
+    bins += np.arange(3) * NORMAL_HISTOGRAM_BINS
+    histogram = np.bincount(
+        bins.ravel(),
+        weights=np.repeat(weights[valid], 3),
+        minlength=histogram_size,
+    ) / 3.0
+
+    return ShapeDescriptor(extents, moments, total_area, histogram)
+
+def get_shape_descriptor(mesh):
+    """Descrittore di forma della mesh in spazio locale (in cache per datablock)"""
+    return get_cached(mesh, "shape_descriptor", _compute_shape_descriptor)
+
+def get_descriptor_features(objects):
+    """Vettori dei descrittori in scala mondo, come array (N, F).
+
+    Le dimensioni sono in scala logaritmica, così la distanza misura i
+    rapporti fra le misure e non le differenze assolute.
+    """
+    eps = 1e-6
+    features = np.empty((len(objects), 7 + 3 * NORMAL_HISTOGRAM_BINS))
+    for i, obj in enumerate(objects):
+        descriptor = get_shape_descriptor(obj.data)
+        matrix = obj.matrix_world
+        scale = abs(matrix.to_3x3().determinant()) ** (1.0 / 3.0)
+
+        extents = np.sort(descriptor.extents * np.abs(np.array(matrix.to_scale())))[::-1]
+        features[i, 0:3] = np.log(extents + eps)
+        features[i, 3:6] = np.log(np.sqrt(descriptor.moments) * scale + eps)
+        features[i, 6] = np.log(np.sqrt(descriptor.area) * scale + eps)
+        features[i, 7:] = descriptor.normal_histogram
+    return features
+
+def nearest_descriptors(query, reference, k, chunk_size=1024):
+    """I k vicini più prossimi di ogni riga di query fra le righe di reference.
+
+    Ricerca a forza bruta a blocchi: restituisce (righe, colonne, distanze).
+    """
+    k = min(k, len(reference))
+    if k == 0 or len(query) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0)
+
+    reference_sq = (reference ** 2).sum(axis=1)
+    rows, cols, distances = [], [], []
+    for start in range(0, len(query), chunk_size):
+        block = query[start:start + chunk_size]
+        d2 = (block ** 2).sum(axis=1)[:, None] + reference_sq[None, :] - 2.0 * block @ reference.T
+        nearest = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        rows.append(np.repeat(np.arange(start, start + len(block)), k))
+        cols.append(nearest.ravel())
+        distances.append(np.sqrt(np.maximum(np.take_along_axis(d2, nearest, axis=1), 0.0)).ravel())
+
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(distances)
+
+
+# =============================================================================
+# ASSEGNAMENTO OTTIMO
+# =============================================================================
+
+def solve_assignment(row_idx, col_idx, costs, n_rows):
+    """Assegnamento uno-a-uno a costo minimo su un grafo bipartito sparso.
+
+    Algoritmo ungherese a cammini minimi (Dijkstra con potenziali) che
+    visita solo gli archi candidati. Ogni riga ha una colonna fittizia
+    "non assegnata" con costo maggiore di qualsiasi assegnamento reale:
+    il risultato massimizza il numero di coppie e, a parità, minimizza il
+    costo totale. Restituisce {riga: colonna} per le righe assegnate.
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    unmatched_cost = float(costs.sum()) + 1.0
+
+    edges = [[] for _ in range(n_rows)]
+    for i, j, c in zip(row_idx.tolist(), col_idx.tolist(), costs.tolist()):
+        edges[i].append((j, c))
+    for i in range(n_rows):
+        # Colonna fittizia privata della riga (chiave negativa)
+        edges[i].append((-1 - i, unmatched_cost))
+
+    u = [0.0] * n_rows     # potenziali delle righe
+    v = {}                 # potenziali delle colonne
+    col_owner = {}         # colonna -> riga assegnata
+    row_col = [None] * n_rows
+
+    for start in range(n_rows):
+        dist_rows = {start: 0.0}
+        settled = {}       # colonna -> distanza
+        prev = {}          # colonna -> riga da cui è stata raggiunta
+        heap = [(c - v.get(j, 0.0), j, start) for j, c in edges[start]]
+        heapq.heapify(heap)
+
+        end = None
+        while heap:
+            d, j, i = heapq.heappop(heap)
+            if j in settled:
+                continue
+            settled[j] = d
+            prev[j] = i
+
+            owner = col_owner.get(j)
+            if owner is None:
+                end = j
+                break
+
+            dist_rows[owner] = d
+            for j2, c in edges[owner]:
+                if j2 not in settled:
+                    heapq.heappush(heap, (d + c - u[owner] - v.get(j2, 0.0), j2, owner))
+
+        # Aggiorna i potenziali: i costi ridotti restano non negativi
+        delta = settled[end]
+        for i, d in dist_rows.items():
+            u[i] += delta - d
+        for j, d in settled.items():
+            if d < delta:
+                v[j] = v.get(j, 0.0) - (delta - d)
+
+        # Inverte il cammino aumentante
+        j = end
+        while True:
+            i = prev[j]
+            previous_col = row_col[i]
+            row_col[i] = j
+            col_owner[j] = i
+            if i == start:
+                break
+            j = previous_col
+
+    return {i: j for i, j in enumerate(row_col) if j is not None and j >= 0}
+
+
+# =============================================================================
+# MOTORE DI MATCHING
+# =============================================================================
+
+class LPHPMatcher:
+    """Matching LP/HP con KD-tree sui centri HP.
+
+    Centri, volumi e numero di vertici vengono calcolati una volta per oggetto;
+    per ogni LP vengono valutati solo gli HP entro max_distance.
+    Con method='SHAPE' i candidati sono invece i vicini nello spazio dei
+    descrittori di forma, indipendentemente dalla posizione (layout esplosi).
+    """
+
+    def __init__(self, lp_objects, hp_objects, lp_suffix, hp_suffix, max_distance=5.0, method='DISTANCE'):
+        self.lp_objects = list(lp_objects)
+        self.hp_objects = list(hp_objects)
+        self.max_distance = max_distance
+        self.method = method
+
+        self.lp_centers = get_object_centers(self.lp_objects)
+        self.hp_centers = get_object_centers(self.hp_objects)
+        self.lp_volumes = get_object_volumes(self.lp_objects)
+        self.hp_volumes = get_object_volumes(self.hp_objects)
+        self.lp_vertex_counts = get_vertex_counts(self.lp_objects)
+        self.hp_vertex_counts = get_vertex_counts(self.hp_objects)
+
+        # Indice dei nomi base: ogni nome diventa un intero, gli HP sono
+        # raggruppati per nome in un solo passaggio
+        name_ids = {}
+        self.lp_name_ids = np.array(
+            [name_ids.setdefault(normalized_base_name(obj.name, lp_suffix), len(name_ids)) for obj in self.lp_objects],
+            dtype=np.int64,
+        )
+        self.hp_name_ids = np.array(
+            [name_ids.setdefault(normalized_base_name(obj.name, hp_suffix), len(name_ids)) for obj in self.hp_objects],
+            dtype=np.int64,
+        )
+        self.hp_by_name = {}
+        for j, name_id in enumerate(self.hp_name_ids.tolist()):
+            self.hp_by_name.setdefault(name_id, []).append(j)
+
+        # Punteggio della coppia scelta per ogni LP (0 per le coppie trovate per nome)
+        self.scores = {}
+
+        self._hp_tree = None
+        self._lp_features = None
+        self._hp_features = None
+
+    @property
+    def hp_tree(self):
+        if self._hp_tree is None:
+            self._hp_tree = build_kdtree(self.hp_centers)
+        return self._hp_tree
+
+    @property
+    def lp_features(self):
+        if self._lp_features is None:
+            self._lp_features = get_descriptor_features(self.lp_objects)
+        return self._lp_features
+
+    @property
+    def hp_features(self):
+        if self._hp_features is None:
+            self._hp_features = get_descriptor_features(self.hp_objects)
+        return self._hp_features
+
+    def candidate_pairs(self, lp_indices=None, hp_indices=None):
+        """Coppie (lp, hp, distanza) candidate per il punteggio"""
+        if self.method == 'SHAPE':
+            return self.descriptor_candidate_pairs(lp_indices, hp_indices)
+        return self.spatial_candidate_pairs(lp_indices, hp_indices)
+
+    def descriptor_candidate_pairs(self, lp_indices=None, hp_indices=None):
+        """Coppie con i DESCRIPTOR_NEIGHBOURS HP più simili per forma a ogni LP.
+
+        La distanza restituita è quella fra i descrittori.
+        """
+        lp_indices = np.arange(len(self.lp_objects)) if lp_indices is None else np.asarray(lp_indices, dtype=np.int64)
+        hp_indices = np.arange(len(self.hp_objects)) if hp_indices is None else np.asarray(hp_indices, dtype=np.int64)
+
+        rows, cols, distances = nearest_descriptors(
+            self.lp_features[lp_indices], self.hp_features[hp_indices], DESCRIPTOR_NEIGHBOURS,
+        )
+        return lp_indices[rows], hp_indices[cols], distances
+
+    def spatial_candidate_pairs(self, lp_indices=None, hp_indices=None):
+        """Coppie (lp, hp, distanza) entro max_distance, trovate con una query a raggio.
+
+        hp_indices limita la ricerca a un sottoinsieme di HP (KD-tree dedicato).
+        """
+        if lp_indices is None:
+            lp_indices = range(len(self.lp_objects))
+
+        if hp_indices is None:
+            hp_indices = np.arange(len(self.hp_objects))
+            tree = self.hp_tree if len(hp_indices) else None
+        else:
+            hp_indices = np.asarray(hp_indices, dtype=np.int64)
+            tree = build_kdtree(self.hp_centers[hp_indices]) if len(hp_indices) else None
+
+        lp_idx = []
+        hp_idx = []
+        distances = []
+        if tree is not None:
+            for i in lp_indices:
+                for _co, j, dist in tree.find_range(self.lp_centers[i], self.max_distance):
+                    lp_idx.append(i)
+                    hp_idx.append(j)
+                    distances.append(dist)
+
+        return (
+            np.array(lp_idx, dtype=np.int64),
+            hp_indices[np.array(hp_idx, dtype=np.int64)],
+            np.array(distances, dtype=np.float64),
+        )
+
+    def score_pairs(self, lp_idx, hp_idx, distances):
+        """Punteggio vettoriale delle coppie candidate (più basso = migliore).
+
+        Restituisce le coppie valide (l'HP deve avere almeno i vertici dell'LP)
+        con il relativo punteggio.
+        """
+        lp_vc = self.lp_vertex_counts[lp_idx]
+        hp_vc = self.hp_vertex_counts[hp_idx]
+
+        # L'HP dovrebbe avere più vertici dell'LP
+        valid = hp_vc >= lp_vc
+        lp_idx, hp_idx, distances = lp_idx[valid], hp_idx[valid], distances[valid]
+        lp_vc, hp_vc = lp_vc[valid], hp_vc[valid]
+
+        lp_vol = self.lp_volumes[lp_idx]
+        hp_vol = self.hp_volumes[hp_idx]
+        max_vol = np.maximum(lp_vol, hp_vol)
+        volume_diff = np.divide(
+            np.abs(lp_vol - hp_vol), max_vol,
+            out=np.zeros_like(max_vol), where=max_vol > 0,
+        )
+
+        inverse_vertex_ratio = np.maximum(lp_vc, 1) / np.maximum(hp_vc, 1)
+
+        name_match = self.lp_name_ids[lp_idx] == self.hp_name_ids[hp_idx]
+        name_bonus = np.where(name_match, 0.0, 2.0)
+
+        scores = distances + volume_diff + name_bonus + inverse_vertex_ratio
+        return lp_idx, hp_idx, scores
+
+    def match_by_name(self):
+        """Abbina in O(1) per LP le coppie con lo stesso nome base.
+
+        Ogni HP viene usato una sola volta. Restituisce {lp: hp}.
+        """
+        best = {}
+        used = set()
+        for i, name_id in enumerate(self.lp_name_ids.tolist()):
+            for j in self.hp_by_name.get(name_id, ()):
+                if j not in used:
+                    best[i] = j
+                    used.add(j)
+                    break
+        return best
+
+    def _match(self, assign):
+        # Prima i nomi, poi il punteggio geometrico solo sugli oggetti rimasti
+        best = self.match_by_name()
+        self.scores = dict.fromkeys(best, 0.0)
+
+        lp_left = [i for i in range(len(self.lp_objects)) if i not in best]
+        hp_left = np.setdiff1d(
+            np.arange(len(self.hp_objects)),
+            np.fromiter(best.values(), dtype=np.int64, count=len(best)),
+        )
+        if lp_left and len(hp_left):
+            lp_idx, hp_idx, scores = self.score_pairs(*self.candidate_pairs(lp_left, hp_left))
+            assigned = assign(lp_idx, hp_idx, scores)
+            pair_scores = dict(zip(zip(lp_idx.tolist(), hp_idx.tolist()), scores.tolist()))
+            for i, j in assigned.items():
+                self.scores[i] = pair_scores[(i, j)]
+            best.update(assigned)
+
+        return [
+            (lp_obj, self.hp_objects[best[i]] if i in best else None)
+            for i, lp_obj in enumerate(self.lp_objects)
+        ]
+
+    @staticmethod
+    def _assign_greedy(lp_idx, hp_idx, scores):
+        best = {}
+        if len(scores):
+            # Ordina per LP e poi per punteggio: il primo di ogni gruppo è il migliore
+            order = np.lexsort((scores, lp_idx))
+            lp_sorted = lp_idx[order]
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = lp_sorted[1:] != lp_sorted[:-1]
+            for k in order[first]:
+                best[int(lp_idx[k])] = int(hp_idx[k])
+        return best
+
+    def match_greedy(self):
+        """Ogni LP prende l'HP con punteggio migliore, indipendentemente dagli altri"""
+        return self._match(self._assign_greedy)
+
+    def match_optimal(self):
+        """Assegnamento uno-a-uno che minimizza il punteggio totale: nessun HP
+        viene assegnato a due LP"""
+        return self._match(
+            lambda lp_idx, hp_idx, scores: solve_assignment(lp_idx, hp_idx, scores, len(self.lp_objects))
+        )
+
+
+# =============================================================================
+# RAGGRUPPAMENTO HP PER SOVRAPPOSIZIONE
+# =============================================================================
+
+# Punti campione per HP usati nel test di sovrapposizione con il BVH
+GROUP_SAMPLE_COUNT = 128
+
+def get_world_bounds(objects):
+    """AABB in coordinate mondo dalle bounding box valutate, come (min, max) (N, 3)"""
+    bounds_min = np.empty((len(objects), 3))
+    bounds_max = np.empty((len(objects), 3))
+    for i, obj in enumerate(objects):
+        matrix = np.array(obj.matrix_world)
+        corners = np.array(obj.bound_box) @ matrix[:3, :3].T + matrix[:3, 3]
+        bounds_min[i] = corners.min(axis=0)
+        bounds_max[i] = corners.max(axis=0)
+    return bounds_min, bounds_max
+
+def overlapping_box_pairs(a_min, a_max, b_min, b_max):
+    """Coppie (i, j) fra i box A e B che si sovrappongono.
+
+    Sweep and prune sull'asse X: i box vengono visitati per inizio crescente
+    e confrontati solo con quelli dell'altro gruppo ancora aperti.
+    """
+    na = len(a_min)
+    starts = np.concatenate((a_min[:, 0], b_min[:, 0]))
+    order = np.argsort(starts, kind='stable')
+
+    pairs = []
+    open_a, open_b = {}, {}
+    heap_a, heap_b = [], []
+    for k in order.tolist():
+        x = starts[k]
+        while heap_a and heap_a[0][0] < x:
+            open_a.pop(heapq.heappop(heap_a)[1], None)
+        while heap_b and heap_b[0][0] < x:
+            open_b.pop(heapq.heappop(heap_b)[1], None)
+
+        if k < na:
+            i = k
+            for j in open_b:
+                if np.all(a_min[i, 1:] <= b_max[j, 1:]) and np.all(b_min[j, 1:] <= a_max[i, 1:]):
+                    pairs.append((i, j))
+            open_a[i] = True
+            heapq.heappush(heap_a, (a_max[i, 0], i))
+        else:
+            j = k - na
+            for i in open_a:
+                if np.all(a_min[i, 1:] <= b_max[j, 1:]) and np.all(b_min[j, 1:] <= a_max[i, 1:]):
+                    pairs.append((i, j))
+            open_b[j] = True
+            heapq.heappush(heap_b, (b_max[j, 0], j))
+
+    return pairs
+
+def _evaluated_samples(obj, depsgraph):
+    """Fino a GROUP_SAMPLE_COUNT vertici della geometria valutata, in coordinate mondo"""
+    obj_eval = obj.evaluated_get(depsgraph)
+    mesh = obj_eval.to_mesh()
+    try:
+        count = len(mesh.vertices)
+        co = np.empty(count * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+    finally:
+        obj_eval.to_mesh_clear()
+
+    co = co.reshape(-1, 3).astype(np.float64)
+    if count > GROUP_SAMPLE_COUNT:
+        co = co[np.linspace(0, count - 1, GROUP_SAMPLE_COUNT).astype(np.int64)]
+
+    matrix = np.array(obj.matrix_world)
+    return co @ matrix[:3, :3].T + matrix[:3, 3]
+
+def _inside_fraction(bvh, lp_obj, points, margin):
+    """Frazione dei punti dentro la mesh LP o entro margin dalla sua superficie"""
+    if len(points) == 0:
+        return 0.0
+
+    matrix = lp_obj.matrix_world
+    matrix_inv = matrix.inverted_safe()
+    hits = 0
+    for co in points:
+        co = Vector(co)
+        location, normal, _index, _dist = bvh.find_nearest(matrix_inv @ co)
+        if location is None:
+            continue
+        offset = co - matrix @ location
+        if offset.length <= margin or offset.dot(matrix.to_3x3() @ normal) < 0:
+            hits += 1
+    return hits / len(points)
+
+def group_hp_by_overlap(lp_objects, hp_objects, depsgraph, margin=0.01):
+    """Assegna ogni HP all'LP con cui si sovrappone di più.
+
+    Broadphase sweep and prune sugli AABB (allargati di margin), poi per ogni
+    coppia candidata: frazione del box HP contenuta nel box LP più frazione
+    dei vertici HP valutati che cadono dentro (o vicino) alla mesh LP, con un
+    BVH costruito una sola volta per LP.
+    Restituisce ({lp: [(hp, punteggio), ...]}, [hp non assegnati]).
+    """
+    lp_objects = list(lp_objects)
+    hp_objects = list(hp_objects)
+
+    lp_min, lp_max = get_world_bounds(lp_objects)
+    hp_min, hp_max = get_world_bounds(hp_objects)
+    lp_min -= margin
+    lp_max += margin
+
+    best = {}     # hp -> (punteggio, lp)
+    lp_trees = {}
+    hp_samples = {}
+    for i, j in overlapping_box_pairs(lp_min, lp_max, hp_min, hp_max):
+        # Frazione del box HP dentro il box LP
+        hp_size = np.maximum(hp_max[j] - hp_min[j], 1e-6)
+        shared = np.clip(np.minimum(lp_max[i], hp_max[j]) - np.maximum(lp_min[i], hp_min[j]), 0.0, None)
+        box_ratio = float(np.prod(np.maximum(shared, 1e-6) / hp_size))
+
+        if i not in lp_trees:
+            lp_trees[i] = BVHTree.FromObject(lp_objects[i], depsgraph)
+        if j not in hp_samples:
+            hp_samples[j] = _evaluated_samples(hp_objects[j], depsgraph)
+
+        score = box_ratio + _inside_fraction(lp_trees[i], lp_objects[i], hp_samples[j], margin)
+        if score > best.get(j, (0.0, None))[0]:
+            best[j] = (score, i)
+
+    groups = {lp: [] for lp in lp_objects}
+    for j, (score, i) in best.items():
+        groups[lp_objects[i]].append((hp_objects[j], score))
+    for members in groups.values():
+        members.sort(key=lambda item: item[1], reverse=True)
+
+    unassigned = [hp for j, hp in enumerate(hp_objects) if j not in best]
+    return groups, unassigned
+
+
+# =============================================================================
+# MATCHING INCREMENTALE
+# =============================================================================
+
+class LPHPMatchPair(bpy.types.PropertyGroup):
+    """Coppia LP/HP trovata dall'ultimo matching"""
+    lp: PointerProperty(type=bpy.types.Object)
+    hp: PointerProperty(type=bpy.types.Object)
+    score: FloatProperty()
+    # Hash di trasformazione e geometria al momento del matching
+    lp_hash: StringProperty()
+    hp_hash: StringProperty()
+
+class LPHPObjectState(bpy.types.PropertyGroup):
+    """Hash di un HP considerato dall'ultimo matching (anche se rimasto libero)"""
+    obj: PointerProperty(type=bpy.types.Object)
+    state_hash: StringProperty()
+
+class LPHPMatchResult(bpy.types.PropertyGroup):
+    """Risultato dell'ultimo matching, salvato nella scena"""
+    pairs: CollectionProperty(type=LPHPMatchPair)
+    hp_states: CollectionProperty(type=LPHPObjectState)
+    lp_suffix: StringProperty()
+    hp_suffix: StringProperty()
+    max_distance: FloatProperty()
+    assignment: StringProperty()
+    method: StringProperty()
+
+
+# Stato degli oggetti all'ultimo matching di questa sessione:
+# session_uid -> ((generazione oggetto, generazione mesh), hash)
+_match_states = {}
+
+def object_state_hash(obj):
+    """Hash di trasformazione mondo, numero di vertici e bounding box dell'oggetto"""
+    metrics = get_mesh_metrics(obj.data)
+    h = hashlib.blake2b(digest_size=8)
+    h.update(np.array(obj.matrix_world, dtype=np.float64).round(6).tobytes())
+    h.update(np.array([metrics.vertex_count], dtype=np.int64).tobytes())
+    h.update(np.concatenate((metrics.bbox_min, metrics.bbox_max)).round(6).tobytes())
+    return h.hexdigest()
+
+def _object_state(obj):
+    return object_generation(obj), geometry_generation(obj.data)
+
+def _remember_state(obj, state_hash):
+    _match_states[obj.session_uid] = (_object_state(obj), state_hash)
+
+def is_unchanged(obj, state_hash):
+    """True se l'oggetto non è cambiato dall'ultimo matching.
+
+    Nella stessa sessione basta confrontare le generazioni aggiornate dall'handler
+    del depsgraph; altrimenti (file riaperto) si ricalcola l'hash.
+    """
+    record = _match_states.get(obj.session_uid)
+    if record is not None and record[1] == state_hash:
+        return record[0] == _object_state(obj)
+
+    if object_state_hash(obj) != state_hash:
+        return False
+    _remember_state(obj, state_hash)
+    return True
+
+def lp_reached_by(lp_objects, hp_objects, lp_suffix, hp_suffix, max_distance, method):
+    """LP che potrebbero scegliere uno degli HP indicati: quelli entro
+    max_distance o con lo stesso nome base (tutti con method='SHAPE')"""
+    if not lp_objects or not hp_objects:
+        return set()
+    if method == 'SHAPE':
+        return set(lp_objects)
+
+    tree = build_kdtree(get_object_centers(hp_objects))
+    hp_names = {normalized_base_name(hp.name, hp_suffix) for hp in hp_objects}
+    reached = set()
+    for lp, center in zip(lp_objects, get_object_centers(lp_objects)):
+        if normalized_base_name(lp.name, lp_suffix) in hp_names or tree.find_range(center, max_distance):
+            reached.add(lp)
+    return reached
+
+def match_incremental(result, lp_objects, hp_objects, lp_suffix, hp_suffix,
+                      max_distance=5.0, assignment='GREEDY', method='DISTANCE'):
+    """Matching che riusa le coppie dell'ultimo risultato non toccate da allora.
+
+    Vengono rivalutati gli LP senza coppia valida e quelli che un HP nuovo o
+    modificato potrebbe ora prendere: con assignment='OPTIMAL' contro gli HP
+    liberi, con 'GREEDY' contro tutti gli HP.
+    Restituisce (coppie nell'ordine di lp_objects, numero di LP rivalutati)
+    e aggiorna result.
+    """
+    kept = []
+    hp_hashes = {}
+    same_settings = (
+        result.lp_suffix == lp_suffix and result.hp_suffix == hp_suffix
+        and abs(result.max_distance - max_distance) < 1e-5 and result.assignment == assignment
+        and result.method == method
+    )
+    if same_settings:
+        lp_set = set(lp_objects)
+        hp_set = set(hp_objects)
+        kept_lp = set()
+        for pair in result.pairs:
+            lp, hp = pair.lp, pair.hp
+            if lp not in lp_set or hp not in hp_set or lp in kept_lp:
+                continue
+            if is_unchanged(lp, pair.lp_hash) and is_unchanged(hp, pair.hp_hash):
+                kept.append((lp, hp, pair.score, pair.lp_hash, pair.hp_hash))
+                kept_lp.add(lp)
+
+        # HP nuovi o spostati: gli LP che raggiungono vanno rivalutati anche
+        # se la loro coppia è intatta, un HP più vicino potrebbe sostituirla
+        recorded = {state.obj: state.state_hash for state in result.hp_states if state.obj}
+        changed_hp = []
+        for hp in hp_objects:
+            state_hash = recorded.get(hp)
+            if state_hash is not None and is_unchanged(hp, state_hash):
+                hp_hashes[hp] = state_hash
+            else:
+                changed_hp.append(hp)
+        reached = lp_reached_by(list(kept_lp), changed_hp, lp_suffix, hp_suffix, max_distance, method)
+        kept = [row for row in kept if row[0] not in reached]
+
+    kept_lp = {lp for lp, *_rest in kept}
+    remaining_lp = [obj for obj in lp_objects if obj not in kept_lp]
+    if assignment == 'OPTIMAL':
+        # Uno a uno: gli HP delle coppie tenute non sono disponibili
+        kept_hp = {hp for _lp, hp, *_rest in kept}
+        remaining_hp = [obj for obj in hp_objects if obj not in kept_hp]
+    else:
+        # Greedy: ogni LP prende il suo HP migliore, come in un matching completo
+        remaining_hp = list(hp_objects)
+
+    matcher = LPHPMatcher(remaining_lp, remaining_hp, lp_suffix, hp_suffix, max_distance, method)
+    if assignment == 'OPTIMAL':
+        new_pairs = matcher.match_optimal()
+    else:
+        new_pairs = matcher.match_greedy()
+
+    rows = list(kept)
+    for i, (lp, hp) in enumerate(new_pairs):
+        if hp is not None:
+            rows.append((lp, hp, matcher.scores.get(i, 0.0), object_state_hash(lp), object_state_hash(hp)))
+
+    # Salva il risultato nella scena
+    result.pairs.clear()
+    for lp, hp, score, lp_hash, hp_hash in rows:
+        pair = result.pairs.add()
+        pair.lp = lp
+        pair.hp = hp
+        pair.score = score
+        pair.lp_hash = lp_hash
+        pair.hp_hash = hp_hash
+        _remember_state(lp, lp_hash)
+        _remember_state(hp, hp_hash)
+        hp_hashes[hp] = hp_hash
+
+    # Stato di tutti gli HP considerati, per riconoscere al prossimo giro quelli nuovi o spostati
+    result.hp_states.clear()
+    for hp in hp_objects:
+        state_hash = hp_hashes.get(hp)
+        if state_hash is None:
+            state_hash = object_state_hash(hp)
+            _remember_state(hp, state_hash)
+        state = result.hp_states.add()
+        state.obj = hp
+        state.state_hash = state_hash
+
+    result.lp_suffix = lp_suffix
+    result.hp_suffix = hp_suffix
+    result.max_distance = max_distance
+    result.assignment = assignment
+    result.method = method
+
+    hp_for_lp = {lp: hp for lp, hp, *_rest in rows}
+    return [(lp, hp_for_lp.get(lp)) for lp in lp_objects], len(remaining_lp)
+
+
+classes = (
+    LPHPMatchPair,
+    LPHPObjectState,
+    LPHPMatchResult,
+)
+
+def lp_hp_matching_register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    bpy.types.Scene.lp_hp_match_result = PointerProperty(type=LPHPMatchResult)
+
+def lp_hp_matching_unregister():
+    del bpy.types.Scene.lp_hp_match_result
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+    _match_states.clear()
@@ -0,0 +1,162 @@
+import bpy
+import numpy as np
+from collections import namedtuple
+from bpy.app.handlers import persistent
+
+
+# Metriche di una mesh in spazio locale
+MeshMetrics = namedtuple("MeshMetrics", ("vertex_count", "bbox_min", "bbox_max", "volume"))
+
+# Generazione della geometria per ogni mesh (session_uid -> int).
+# Viene incrementata dall'handler del depsgraph ad ogni modifica della geometria.
+_geometry_generations = {}
+
+# Generazione di ogni oggetto (session_uid -> int), incrementata quando
+# cambiano la trasformazione o la geometria dell'oggetto
+_object_generations = {}
+
+# Versione dei valori degli attributi per ogni mesh (session_uid -> int).
+# Le scritture con foreach_set non passano dal depsgraph: chi scrive la
+# incrementa con touch_attributes.
+_attribute_generations = {}
+
+# Valori in cache per ogni mesh: session_uid -> {chiave: (generazione, valore)}
+_mesh_cache = {}
+
+# Mesh (session_uid) il cui prossimo aggiornamento del depsgraph cambia solo
+# la selezione: non incrementa la generazione
+_selection_updates = set()
+
+
+def geometry_generation(mesh):
+    """Generazione corrente della geometria di una mesh"""
+    return _geometry_generations.get(mesh.session_uid, 0)
+
+def object_generation(obj):
+    """Generazione corrente di trasformazione e geometria di un oggetto"""
+    return _object_generations.get(obj.session_uid, 0)
+
+def mark_selection_update(mesh):
+    """Segnala che il prossimo aggiornamento della mesh (es. bmesh.update_edit_mesh
+    dopo aver cambiato solo la selezione) non modifica la geometria, così le
+    cache restano valide"""
+    _selection_updates.add(mesh.session_uid)
+
+def attribute_generation(mesh):
+    """Versione corrente dei valori degli attributi di una mesh"""
+    return _attribute_generations.get(mesh.session_uid, 0)
+
+def touch_attributes(mesh):
+    """Segnala che i valori degli attributi della mesh sono cambiati"""
+    uid = mesh.session_uid
+    _attribute_generations[uid] = _attribute_generations.get(uid, 0) + 1
+
+def get_cached(mesh, key, builder, attributes=False):
+    """Restituisce il valore in cache per la mesh, ricalcolandolo con builder(mesh)
+    se la geometria è cambiata dall'ultimo calcolo.
+
+    Con attributes=True il valore dipende anche dagli attributi e viene
+    ricalcolato dopo ogni touch_attributes. La cache è per datablock: gli
+    oggetti che usano la stessa mesh la condividono.
+    """
+    uid = mesh.session_uid
+    generation = _geometry_generations.get(uid, 0)
+    if attributes:
+        generation = (generation, _attribute_generations.get(uid, 0))
+    entry = _mesh_cache.setdefault(uid, {})
+
+    cached = entry.get(key)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+
+    value = builder(mesh)
+    entry[key] = (generation, value)
+    return value
+
+def invalidate_mesh_cache(mesh=None):
+    """Svuota la cache di una mesh, o di tutte se mesh è None"""
+    if mesh is None:
+        _mesh_cache.clear()
+    else:
+        _mesh_cache.pop(mesh.session_uid, None)
+
+
+# =============================================================================
+# METRICHE
+# =============================================================================
+
+def _compute_mesh_metrics(mesh):
+    vertex_count = len(mesh.vertices)
+    if vertex_count == 0:
+        zero = np.zeros(3)
+        return MeshMetrics(0, zero, zero, 0.0)
+
+    co = np.empty(vertex_count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co.shape = (vertex_count, 3)
+
+    bbox_min = co.min(axis=0).astype(np.float64)
+    bbox_max = co.max(axis=0).astype(np.float64)
+    volume = float(np.prod(bbox_max - bbox_min))
+
+    return MeshMetrics(vertex_count, bbox_min, bbox_max, volume)
+
+def get_mesh_metrics(mesh):
+    """Numero di vertici, bounding box locale e volume della mesh (in cache)"""
+    return get_cached(mesh, "metrics", _compute_mesh_metrics)
+
+
+# =============================================================================
+# HANDLERS
+# =============================================================================
+
+@persistent
+def _mesh_cache_depsgraph_update(scene, depsgraph):
+    for update in depsgraph.updates:
+        id_data = update.id.original
+
+        if isinstance(id_data, bpy.types.Object):
+            is_mesh = id_data.type == 'MESH' and id_data.data is not None
+            geometry = update.is_updated_geometry and not (
+                is_mesh and id_data.data.session_uid in _selection_updates)
+            if update.is_updated_transform or geometry:
+                uid = id_data.session_uid
+                _object_generations[uid] = _object_generations.get(uid, 0) + 1
+            if not is_mesh:
+                continue
+            id_data = id_data.data
+
+        if not update.is_updated_geometry:
+            continue
+
+        if isinstance(id_data, bpy.types.Mesh):
+            uid = id_data.session_uid
+            if uid in _selection_updates:
+                continue
+            _geometry_generations[uid] = _geometry_generations.get(uid, 0) + 1
+
+    _selection_updates.clear()
+
+@persistent
+def _mesh_cache_load_post(dummy):
+    _geometry_generations.clear()
+    _object_generations.clear()
+    _attribute_generations.clear()
+    _mesh_cache.clear()
+    _selection_updates.clear()
+
+
+def mesh_cache_register():
+    bpy.app.handlers.depsgraph_update_post.append(_mesh_cache_depsgraph_update)
+    bpy.app.handlers.load_post.append(_mesh_cache_load_post)
+
+def mesh_cache_unregister():
+    if _mesh_cache_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_mesh_cache_load_post)
+    if _mesh_cache_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_mesh_cache_depsgraph_update)
+    _geometry_generations.clear()
+    _object_generations.clear()
+    _attribute_generations.clear()
+    _mesh_cache.clear()
+    _selection_updates.clear()
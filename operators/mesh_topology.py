@@ -0,0 +1,231 @@
+import bpy
+import numpy as np
+import zlib
+from collections import OrderedDict, namedtuple
+from bpy.app.handlers import persistent
+from .mesh_cache import geometry_generation
+
+
+# Adiacenza in formato CSR: gli elementi collegati all'elemento i sono
+# indices[offsets[i]:offsets[i + 1]]
+Adjacency = namedtuple("Adjacency", ("offsets", "indices"))
+
+# Numero massimo di mesh tenute in cache (le topologie pesanti occupano molta memoria)
+MAX_CACHED_TOPOLOGIES = 8
+
+# session_uid -> (generazione, fingerprint, MeshTopology), dalla meno alla più recente
+_topology_cache = OrderedDict()
+
+
+def build_adjacency(keys, values, count):
+    """CSR che raggruppa values per chiave (0 <= chiave < count), in ordine stabile"""
+    order = np.argsort(keys, kind='stable')
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=count), out=offsets[1:])
+    return Adjacency(offsets, np.asarray(values)[order])
+
+def gather_adjacency(adjacency, rows):
+    """Elementi collegati alle righe indicate, senza cicli Python.
+
+    Restituisce (riga di ogni elemento, elementi): costa quanto il numero
+    di elementi raccolti, non quanto la dimensione della CSR.
+    """
+    offsets, indices = adjacency
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = offsets[rows]
+    counts = offsets[rows + 1] - starts
+    row_of_entry = np.repeat(rows, counts)
+    positions = np.arange(counts.sum()) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return row_of_entry, indices[positions]
+
+
+class MeshTopology:
+    """Array di topologia di una mesh e adiacenze CSR costruite su richiesta.
+
+    Gli array di base sono quelli della mesh (.corner_vert, .corner_edge,
+    .edge_verts, dimensioni delle facce); le adiacenze vengono calcolate
+    la prima volta che servono e restano in memoria con la topologia.
+    """
+
+    def __init__(self, vertex_count, corner_vert, corner_edge, loop_totals, edge_verts):
+        self.vertex_count = vertex_count
+        self.edge_count = len(edge_verts)
+        self.face_count = len(loop_totals)
+        self.corner_count = len(corner_vert)
+
+        self.corner_vert = corner_vert
+        self.corner_edge = corner_edge
+        self.edge_verts = edge_verts
+        self.loop_totals = loop_totals
+        self.face_offsets = np.zeros(self.face_count + 1, dtype=np.int64)
+        np.cumsum(loop_totals, out=self.face_offsets[1:])
+        self.loop_starts = self.face_offsets[:-1]
+        self.corner_face = np.repeat(np.arange(self.face_count, dtype=np.int32), loop_totals)
+
+        self._previous_corner = None
+        self._next_corner = None
+        self._edge_corners = None
+        self._face_pairs = None
+        self._face_faces = None
+        self._vert_faces = None
+        self._vert_edges = None
+        self._edge_faces = None
+
+    @property
+    def previous_corner(self):
+        """Corner precedente nella stessa faccia (il primo corner punta all'ultimo)"""
+        if self._previous_corner is None:
+            previous = np.arange(self.corner_count, dtype=np.int32) - 1
+            previous[self.loop_starts] = self.loop_starts + self.loop_totals - 1
+            self._previous_corner = previous
+        return self._previous_corner
+
+    @property
+    def next_corner(self):
+        """Corner successivo nella stessa faccia (l'ultimo corner punta al primo)"""
+        if self._next_corner is None:
+            following = np.arange(self.corner_count, dtype=np.int32) + 1
+            following[self.face_offsets[1:] - 1] = self.loop_starts
+            self._next_corner = following
+        return self._next_corner
+
+    @property
+    def face_verts(self):
+        return Adjacency(self.face_offsets, self.corner_vert)
+
+    @property
+    def face_edges(self):
+        return Adjacency(self.face_offsets, self.corner_edge)
+
+    @property
+    def vert_faces(self):
+        if self._vert_faces is None:
+            self._vert_faces = build_adjacency(self.corner_vert, self.corner_face, self.vertex_count)
+        return self._vert_faces
+
+    @property
+    def vert_edges(self):
+        if self._vert_edges is None:
+            edges = np.repeat(np.arange(self.edge_count, dtype=np.int32), 2)
+            self._vert_edges = build_adjacency(self.edge_verts.ravel(), edges, self.vertex_count)
+        return self._vert_edges
+
+    @property
+    def edge_faces(self):
+        if self._edge_faces is None:
+            self._edge_faces = build_adjacency(self.corner_edge, self.corner_face, self.edge_count)
+        return self._edge_faces
+
+    @property
+    def edge_corners(self):
+        """Corner di ogni edge (uno per faccia), nello stesso ordine di edge_faces"""
+        if self._edge_corners is None:
+            corners = np.arange(self.corner_count, dtype=np.int32)
+            self._edge_corners = build_adjacency(self.corner_edge, corners, self.edge_count)
+        return self._edge_corners
+
+    @property
+    def face_pairs(self):
+        """Coppie di facce che condividono un edge: (edge, corner_a, corner_b).
+
+        Ogni coppia è data dai corner delle due facce sull'edge; le facce
+        sono corner_face[corner_a] e corner_face[corner_b]. Gli edge non
+        manifold collegano in catena le facce consecutive.
+        """
+        if self._face_pairs is None:
+            offsets, corners = self.edge_corners
+            edge_of_entry = np.repeat(np.arange(self.edge_count, dtype=np.int32), np.diff(offsets))
+            first = np.flatnonzero(edge_of_entry[:-1] == edge_of_entry[1:])
+            self._face_pairs = (edge_of_entry[first], corners[first], corners[first + 1])
+        return self._face_pairs
+
+    @property
+    def face_faces(self):
+        """Facce adiacenti (con un edge in comune) di ogni faccia"""
+        if self._face_faces is None:
+            _edges, corner_a, corner_b = self.face_pairs
+            face_a = self.corner_face[corner_a]
+            face_b = self.corner_face[corner_b]
+            self._face_faces = build_adjacency(
+                np.concatenate((face_a, face_b)), np.concatenate((face_b, face_a)), self.face_count)
+        return self._face_faces
+
+
+# =============================================================================
+# LETTURA E CACHE
+# =============================================================================
+
+def _read_topology_arrays(mesh):
+    corner_vert = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", corner_vert)
+    edge_verts = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edge_verts)
+    return corner_vert, edge_verts.reshape(-1, 2)
+
+def _element_counts(mesh):
+    return len(mesh.vertices), len(mesh.edges), len(mesh.polygons), len(mesh.loops)
+
+def topology_fingerprint(mesh, corner_vert=None, edge_verts=None):
+    """Impronta economica della topologia: numero di elementi più il CRC
+    di .corner_vert e .edge_verts"""
+    if corner_vert is None:
+        corner_vert, edge_verts = _read_topology_arrays(mesh)
+    return _element_counts(mesh) + (zlib.crc32(corner_vert), zlib.crc32(edge_verts))
+
+def get_topology(mesh):
+    """MeshTopology della mesh, ricostruita solo se la topologia è cambiata.
+
+    Legge i dati della mesh, che in Edit Mode non sono aggiornati: chi la
+    usa in Edit Mode deve prima chiamare obj.update_from_editmode().
+    Se la geometria non è cambiata dall'ultima chiamata (generazione della
+    mesh_cache) e il numero di elementi è lo stesso, il fingerprint non
+    viene nemmeno ricalcolato.
+    """
+    uid = mesh.session_uid
+    generation = geometry_generation(mesh)
+    cached = _topology_cache.get(uid)
+
+    if cached is not None:
+        cached_generation, fingerprint, topology = cached
+        if cached_generation == generation and fingerprint[:4] == _element_counts(mesh):
+            _topology_cache.move_to_end(uid)
+            return topology
+
+    corner_vert, edge_verts = _read_topology_arrays(mesh)
+    fingerprint = topology_fingerprint(mesh, corner_vert, edge_verts)
+
+    if cached is not None and cached[1] == fingerprint:
+        topology = cached[2]
+    else:
+        corner_edge = np.empty(len(corner_vert), dtype=np.int32)
+        mesh.loops.foreach_get("edge_index", corner_edge)
+        loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", loop_totals)
+        topology = MeshTopology(len(mesh.vertices), corner_vert, corner_edge, loop_totals, edge_verts)
+
+    _topology_cache[uid] = (generation, fingerprint, topology)
+    _topology_cache.move_to_end(uid)
+    while len(_topology_cache) > MAX_CACHED_TOPOLOGIES:
+        _topology_cache.popitem(last=False)
+    return topology
+
+def invalidate_topology(mesh=None):
+    """Elimina la topologia in cache di una mesh, o di tutte se mesh è None"""
+    if mesh is None:
+        _topology_cache.clear()
+    else:
+        _topology_cache.pop(mesh.session_uid, None)
+
+
+@persistent
+def _mesh_topology_load_post(dummy):
+    _topology_cache.clear()
+
+
+def mesh_topology_register():
+    bpy.app.handlers.load_post.append(_mesh_topology_load_post)
+
+def mesh_topology_unregister():
+    if _mesh_topology_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_mesh_topology_load_post)
+    _topology_cache.clear()
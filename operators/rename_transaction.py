@@ -0,0 +1,129 @@
+import bpy
+
+
+# Lunghezza massima di un nome di ID in Blender (in byte)
+MAX_NAME_LENGTH = 63
+
+TEMP_NAME_PREFIX = "TEMP_RENAME_"
+
+
+def plan_renames(renames, existing_names):
+    """Calcola l'ordine delle rinomine senza collisioni.
+
+    renames: lista di (nome_attuale, nome_nuovo).
+    existing_names: tutti i nomi già usati nello stesso namespace.
+
+    Restituisce (steps, conflicts):
+    - steps: lista ordinata di (indice, nome) da assegnare. Le catene
+      (A prende il nome di B, che prende il nome di C...) sono ordinate in
+      modo che ogni nome sia libero quando viene assegnato; ogni ciclo
+      (scambi) usa un solo nome temporaneo. Ogni oggetto viene quindi
+      rinominato una volta, più una per ciclo.
+    - conflicts: lista di (indice, motivo) per le rinomine non applicabili
+      (nome duplicato, nome già usato da un oggetto che non cambia, nome
+      troppo lungo o vuoto).
+    """
+    conflicts = []
+    pending = {}          # indice -> nome nuovo
+    target_owner = {}     # nome nuovo -> indice
+
+    for i, (old, new) in enumerate(renames):
+        if old == new:
+            continue
+        if not new:
+            conflicts.append((i, "empty name"))
+        elif len(new.encode("utf-8")) > MAX_NAME_LENGTH:
+            conflicts.append((i, "name too long"))
+        elif new in target_owner:
+            conflicts.append((i, f"'{new}' requested twice"))
+        else:
+            pending[i] = new
+            target_owner[new] = i
+
+    # Un nome è liberabile solo se chi lo possiede verrà rinominato
+    holder = {renames[i][0]: i for i in pending}
+
+    # Scarta le rinomine verso nomi che resteranno occupati, a cascata:
+    # chi voleva il nome di un oggetto scartato resta anch'esso bloccato
+    blocked = [
+        i for i, new in pending.items()
+        if new in existing_names and new not in holder
+    ]
+    while blocked:
+        i = blocked.pop()
+        if i not in pending:
+            continue
+        new = pending.pop(i)
+        del target_owner[new]
+        conflicts.append((i, f"'{new}' is already used"))
+
+        old = renames[i][0]
+        del holder[old]
+        waiting = target_owner.get(old)
+        if waiting is not None:
+            blocked.append(waiting)
+
+    temp_steps = []
+    final_steps = []
+    done = set()
+
+    def walk_back(i):
+        # Rinomina i, poi chi aspettava il suo vecchio nome, e così via
+        while i is not None and i not in done:
+            final_steps.append((i, pending[i]))
+            done.add(i)
+            i = target_owner.get(renames[i][0])
+
+    # Catene: partono dagli oggetti il cui nome di destinazione è già libero
+    for i, new in pending.items():
+        if new not in holder:
+            walk_back(i)
+
+    # Cicli: un nome temporaneo per ciclo libera il primo nome
+    used_names = set(existing_names) | set(target_owner)
+    counter = 0
+    for i in pending:
+        if i in done:
+            continue
+
+        temp_name = f"{TEMP_NAME_PREFIX}{counter}"
+        while temp_name in used_names:
+            counter += 1
+            temp_name = f"{TEMP_NAME_PREFIX}{counter}"
+        used_names.add(temp_name)
+
+        temp_steps.append((i, temp_name))
+        done.add(i)
+        walk_back(target_owner.get(renames[i][0]))
+        final_steps.append((i, pending[i]))
+
+    return temp_steps + final_steps, conflicts
+
+
+def rename_objects(renames):
+    """Rinomina in blocco una lista di (oggetto, nome_nuovo).
+
+    Restituisce (renamed, conflicts): il numero di oggetti rinominati e la
+    lista di (oggetto, nome_nuovo, motivo) che non è stato possibile applicare.
+    """
+    renames = list(renames)
+    existing_names = {obj.name for obj in bpy.data.objects if obj.library is None}
+
+    steps, conflicts = plan_renames(
+        [(obj.name, new_name) for obj, new_name in renames],
+        existing_names,
+    )
+
+    for i, name in steps:
+        renames[i][0].name = name
+
+    # Gli oggetti rinominati sono quelli che hanno raggiunto il nome finale
+    renamed = 0
+    for i in {i for i, _name in steps}:
+        obj, new_name = renames[i]
+        if obj.name == new_name:
+            renamed += 1
+        else:
+            conflicts.append((i, f"renamed to '{obj.name}'"))
+
+    return renamed, [(renames[i][0], renames[i][1], reason) for i, reason in conflicts]
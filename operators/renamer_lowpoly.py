@@ -1,7 +1,9 @@
 import bpy
-import bmesh
 from mathutils import Vector
-import re
+
+from .lp_hp_matching import LPHPMatcher, group_hp_by_overlap, match_incremental, strip_suffix
+from .mesh_cache import get_mesh_metrics
+from .rename_transaction import rename_objects
 
 def get_object_center(obj):
     """Ottiene il centro geometrico dell'oggetto"""
@@ -31,77 +33,63 @@ def get_vertex_count(obj):
     if obj.type != 'MESH':
         return 0
     
-    bm = bmesh.new()
-    bm.from_mesh(obj.data)
-    vertex_count = len(bm.verts)
-    bm.free()
-    return vertex_count
+    return get_mesh_metrics(obj.data).vertex_count
+
+def add_suffix(name, suffix, prefs):
+    """Sostituisce i suffissi LP/HP esistenti con quello richiesto"""
+    # Rimuove suffissi esistenti (prima LP, poi HP)
+    clean_name = strip_suffix(name, prefs.lowpoly_suffix)
+    clean_name = strip_suffix(clean_name, prefs.highpoly_suffix)
+    return clean_name + suffix
+
+def add_suffix_to_objects(objects, suffix, prefs):
+    """Applica il suffisso a tutti gli oggetti in un'unica transazione di rinomina"""
+    return rename_objects((obj, add_suffix(obj.name, suffix, prefs)) for obj in objects)
+
+def batch_rename_objects(objects, base_name):
+    """Rinomina gli oggetti come base_01, base_02, ... in un'unica transazione"""
+    # Formato: nome_01, nome_02, ecc.
+    return rename_objects((obj, f"{base_name}_{i:02d}") for i, obj in enumerate(objects, 1))
 
 def find_matching_hp(lp_obj, potential_hp_objects, max_distance=5.0):
     """Trova l'HP corrispondente per un oggetto LP"""
 
-    prefs = bpy.context.preferences.addons['manutools'].preferences
-    lp_suffix = prefs.lowpoly_suffix
-    hp_suffix = prefs.highpoly_suffix
+    lp_suffix, hp_suffix, _max_distance = get_matching_settings()
 
+    hp_objects = [obj for obj in potential_hp_objects if obj != lp_obj]
+    matcher = LPHPMatcher([lp_obj], hp_objects, lp_suffix, hp_suffix, max_distance)
 
+    return matcher.match_greedy()[0][1]
 
-    lp_center = get_object_center(lp_obj)
-    lp_volume = get_bounding_box_volume(lp_obj)
-    lp_vertex_count = get_vertex_count(lp_obj)
-    
-    # Estrae il nome base dell'LP (rimuove _lp)
-    lp_base_name = re.sub(rf'{re.escape(lp_suffix)}$', '', lp_obj.name, flags=re.IGNORECASE)
-    
-    best_match = None
-    best_score = float('inf')
+def get_matching_settings():
+    """Suffissi e distanza massima dalle preferences (default se l'addon non è attivo,
+    ad esempio quando il matcher viene usato da riga di comando)"""
+    try:
+        prefs = bpy.context.preferences.addons['manutools'].preferences
+    except KeyError:
+        return "_lp", "_hp", 5.0
     
-    for hp_obj in potential_hp_objects:
-        if hp_obj == lp_obj:
-            continue
-            
-        # 1. Controllo per naming convention
-        hp_base_name = re.sub(rf'{re.escape(hp_suffix)}$', '', hp_obj.name, flags=re.IGNORECASE)
-        name_match = lp_base_name.lower() == hp_base_name.lower()
-        
-        # 2. Controllo distanza
-        hp_center = get_object_center(hp_obj)
-        distance = (lp_center - hp_center).length
-        
-        if distance > max_distance:
-            continue
-            
-        # 3. Controllo volume e vertici
-        hp_volume = get_bounding_box_volume(hp_obj)
-        hp_vertex_count = get_vertex_count(hp_obj)
-        
-        # L'HP dovrebbe avere più vertici dell'LP
-        if hp_vertex_count < lp_vertex_count:
-            continue
-            
-        # Calcola punteggio (più basso = migliore)
-        distance_score = distance
-        volume_diff = abs(lp_volume - hp_volume) / max(lp_volume, hp_volume) if max(lp_volume, hp_volume) > 0 else 0
-        vertex_ratio = hp_vertex_count / max(lp_vertex_count, 1)
-        name_bonus = 0 if name_match else 2
-        
-        score = distance_score + volume_diff + name_bonus + (1 / vertex_ratio)
-        
-        if score < best_score:
-            best_score = score
-            best_match = hp_obj
-    
-    return best_match
+    return prefs.lowpoly_suffix, prefs.highpoly_suffix, prefs.max_matching_distance
 
-def auto_match_lp_hp():
-    """Funzione principale per il matching automatico LP-HP"""
+def auto_match_lp_hp(assignment='GREEDY', objects=None, lp_suffix=None, hp_suffix=None,
+                     max_distance=None, rename=True, incremental=False, method='DISTANCE'):
+    """Funzione principale per il matching automatico LP-HP
 
-    prefs = bpy.context.preferences.addons['manutools'].preferences
-    lp_suffix = prefs.lowpoly_suffix
+    Senza argomenti usa gli oggetti selezionati e le impostazioni delle preferences.
+    Con incremental=True riusa le coppie dell'ultimo matching della scena e
+    rivaluta solo gli oggetti modificati da allora.
+    """
 
+    default_lp_suffix, default_hp_suffix, default_max_distance = get_matching_settings()
+    lp_suffix = lp_suffix or default_lp_suffix
+    hp_suffix = hp_suffix or default_hp_suffix
+    if max_distance is None:
+        max_distance = default_max_distance
 
     # Usa solo gli oggetti selezionati
-    mesh_objects = [obj for obj in bpy.context.selected_objects if obj.type == 'MESH']
+    if objects is None:
+        objects = bpy.context.selected_objects
+    mesh_objects = [obj for obj in objects if obj.type == 'MESH']
     
     # Separa LP e HP
     lp_objects = [obj for obj in mesh_objects if obj.name.lower().endswith(lp_suffix.lower())]
@@ -110,21 +98,42 @@ def auto_match_lp_hp():
     matches = []
     unmatched_lp = []
     
-    # Trova i match
-    for lp_obj in lp_objects:
-        hp_match = find_matching_hp(lp_obj, potential_hp_objects, prefs.max_matching_distance)
+    # Trova i match (KD-tree sui centri HP, punteggio solo per i vicini)
+    if incremental:
+        pairs, rescored = match_incremental(
+            bpy.context.scene.lp_hp_match_result,
+            lp_objects, potential_hp_objects,
+            lp_suffix, hp_suffix, max_distance, assignment, method,
+        )
+        print(f"Incremental matching: {rescored} of {len(lp_objects)} LP rescored")
+    else:
+        matcher = LPHPMatcher(lp_objects, potential_hp_objects, lp_suffix, hp_suffix, max_distance, method)
         
+        if assignment == 'OPTIMAL':
+            pairs = matcher.match_optimal()
+        else:
+            pairs = matcher.match_greedy()
+    
+    renames = []
+    for lp_obj, hp_match in pairs:
         if hp_match:
             matches.append((lp_obj, hp_match))
             # Rinomina l'HP seguendo la convenzione
-            expected_hp_name = re.sub(rf'{re.escape(lp_suffix)}$', prefs.highpoly_suffix, lp_obj.name, flags=re.IGNORECASE)
-            if hp_match.name != expected_hp_name:
-                old_name = hp_match.name
-                hp_match.name = expected_hp_name
-                print(f"Renamed: {old_name} -> {hp_match.name}")
+            expected_hp_name = strip_suffix(lp_obj.name, lp_suffix) + hp_suffix
+            if rename and hp_match.name != expected_hp_name:
+                renames.append((hp_match, expected_hp_name))
         else:
             unmatched_lp.append(lp_obj)
     
+    # Rinomina tutti gli HP in un'unica transazione
+    old_names = [hp.name for hp, _name in renames]
+    renamed, conflicts = rename_objects(renames)
+    for old_name, (hp, _name) in zip(old_names, renames):
+        if hp.name != old_name:
+            print(f"Renamed: {old_name} -> {hp.name}")
+    for hp, new_name, reason in conflicts:
+        print(f"Not renamed: {hp.name} -> {new_name} ({reason})")
+    
     # Report risultati
     print(f"\n=== MATCHING LP-HP ===")
     print(f"Matches founds: {len(matches)}")
@@ -148,14 +157,118 @@ class OBJECT_OT_auto_match_lp_hp(bpy.types.Operator):
     bl_description = "Automatically find matches between selected Low Poly and High Poly models"
     bl_options = {'REGISTER', 'UNDO'}
     
+    assignment: bpy.props.EnumProperty(
+        name="Assignment",
+        items=[
+            ('GREEDY', "Nearest", "Each LP takes its best HP independently"),
+            ('OPTIMAL', "Optimal", "One-to-one assignment with the lowest total score, no HP is shared"),
+        ],
+        default='GREEDY'
+    )
+    
+    method: bpy.props.EnumProperty(
+        name="Method",
+        items=[
+            ('DISTANCE', "Position", "Match objects within the maximum matching distance"),
+            ('SHAPE', "Shape", "Match by shape descriptors, for exploded layouts where LP and HP are not co-located"),
+        ],
+        default='DISTANCE'
+    )
+    
+    incremental: bpy.props.BoolProperty(
+        name="Incremental",
+        description="Keep the pairs of the last run whose objects didn't change and only rescore the others",
+        default=False
+    )
+    
     def execute(self, context):
-        matches, unmatched = auto_match_lp_hp()
+        matches, unmatched = auto_match_lp_hp(self.assignment, incremental=self.incremental, method=self.method)
         
         message = f"Matches found: {len(matches)}, Unmatched LP: {len(unmatched)}"
         self.report({'INFO'}, message)
         
         return {'FINISHED'}
 
+class OBJECT_OT_group_hp_to_lp(bpy.types.Operator):
+    bl_idname = "object.group_hp_to_lp"
+    bl_label = "Group HP Parts"
+    bl_description = "Assign every selected High Poly object to the Low Poly it overlaps the most and group the parts under the LP name"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    action: bpy.props.EnumProperty(
+        name="Action",
+        items=[
+            ('RENAME', "Rename", "Rename the HP parts after their LP (name_hp, name_hp.001, ...)"),
+            ('COLLECT', "Collect", "Move the HP parts of each LP into a collection named after it"),
+        ],
+        default='RENAME'
+    )
+    
+    margin: bpy.props.FloatProperty(
+        name="Margin",
+        description="Tolerance around the LP when testing the overlap",
+        default=0.01,
+        min=0.0,
+        subtype='DISTANCE'
+    )
+    
+    def execute(self, context):
+        lp_suffix, hp_suffix, _max_distance = get_matching_settings()
+        
+        mesh_objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        lp_objects = [obj for obj in mesh_objects if obj.name.lower().endswith(lp_suffix.lower())]
+        hp_objects = [obj for obj in mesh_objects if not obj.name.lower().endswith(lp_suffix.lower())]
+        
+        if not lp_objects or not hp_objects:
+            self.report({'WARNING'}, f"Select LP objects (ending with {lp_suffix}) and their HP parts")
+            return {'CANCELLED'}
+        
+        groups, unassigned = group_hp_by_overlap(
+            lp_objects, hp_objects, context.evaluated_depsgraph_get(), self.margin
+        )
+        grouped = sum(len(members) for members in groups.values())
+        
+        if self.action == 'RENAME':
+            # La parte con la sovrapposizione maggiore prende il nome senza numero
+            renames = []
+            for lp_obj, members in groups.items():
+                hp_name = strip_suffix(lp_obj.name, lp_suffix) + hp_suffix
+                for k, (hp_obj, _score) in enumerate(members):
+                    renames.append((hp_obj, hp_name if k == 0 else f"{hp_name}.{k:03d}"))
+            _renamed, conflicts = rename_objects(renames)
+            for hp_obj, new_name, reason in conflicts:
+                print(f"Not renamed: {hp_obj.name} -> {new_name} ({reason})")
+        else:
+            conflicts = []
+            scene_collections = set(context.scene.collection.children_recursive)
+            for lp_obj, members in groups.items():
+                if not members:
+                    continue
+                
+                collection_name = strip_suffix(lp_obj.name, lp_suffix) + hp_suffix
+                collection = bpy.data.collections.get(collection_name)
+                if collection is None:
+                    collection = bpy.data.collections.new(collection_name)
+                if collection not in scene_collections:
+                    context.scene.collection.children.link(collection)
+                    scene_collections.add(collection)
+                
+                for hp_obj, _score in members:
+                    for user_collection in list(hp_obj.users_collection):
+                        if user_collection != collection:
+                            user_collection.objects.unlink(hp_obj)
+                    if hp_obj.name not in collection.objects:
+                        collection.objects.link(hp_obj)
+        
+        message = f"Grouped {grouped} HP parts under {sum(1 for m in groups.values() if m)} LP"
+        if unassigned:
+            message += f", {len(unassigned)} HP without overlap"
+        if conflicts:
+            message += f", {len(conflicts)} not renamed (name already in use)"
+        self.report({'WARNING'} if unassigned or conflicts else {'INFO'}, message)
+        
+        return {'FINISHED'}
+
 class OBJECT_OT_add_lp_suffix(bpy.types.Operator):
     bl_idname = "object.add_lp_suffix"
     bl_label = "Add _lp"
@@ -174,21 +287,13 @@ def execute(self, context):
             self.report({'WARNING'}, "No objects selected")
             return {'CANCELLED'}
         
-        renamed_count = 0
-        for obj in selected_objects:
-            # VERSIONE CORRETTA ✨
-            # Rimuove suffissi esistenti (prima LP, poi HP)
-            clean_name = obj.name
-            clean_name = re.sub(rf'{re.escape(prefs.lowpoly_suffix)}$', '', clean_name, flags=re.IGNORECASE)
-            clean_name = re.sub(rf'{re.escape(prefs.highpoly_suffix)}$', '', clean_name, flags=re.IGNORECASE)
-            
-            new_name = clean_name + prefs.lowpoly_suffix
-            
-            if obj.name != new_name:
-                obj.name = new_name
-                renamed_count += 1
+        renamed_count, conflicts = add_suffix_to_objects(selected_objects, prefs.lowpoly_suffix, prefs)
         
-        self.report({'INFO'}, f"Renamed {renamed_count} objects with {prefs.lowpoly_suffix}")
+        if conflicts:
+            self.report({'WARNING'}, f"Renamed {renamed_count} objects with {prefs.lowpoly_suffix}, "
+                                     f"{len(conflicts)} skipped (name already in use)")
+        else:
+            self.report({'INFO'}, f"Renamed {renamed_count} objects with {prefs.lowpoly_suffix}")
         return {'FINISHED'}
 
 class OBJECT_OT_add_hp_suffix(bpy.types.Operator):
@@ -206,20 +311,13 @@ def execute(self, context):
             self.report({'WARNING'}, "No objects selected")
             return {'CANCELLED'}
         
-        renamed_count = 0
-        for obj in selected_objects:
-            # Rimuove suffissi esistenti (prima LP, poi HP)
-            clean_name = obj.name
-            clean_name = re.sub(rf'{re.escape(prefs.lowpoly_suffix)}$', '', clean_name, flags=re.IGNORECASE)
-            clean_name = re.sub(rf'{re.escape(prefs.highpoly_suffix)}$', '', clean_name, flags=re.IGNORECASE)
-            
-            new_name = clean_name + prefs.highpoly_suffix
-            
-            if obj.name != new_name:
-                obj.name = new_name
-                renamed_count += 1
+        renamed_count, conflicts = add_suffix_to_objects(selected_objects, prefs.highpoly_suffix, prefs)
         
-        self.report({'INFO'}, f"Renamed {renamed_count} objects with {prefs.highpoly_suffix}")
+        if conflicts:
+            self.report({'WARNING'}, f"Renamed {renamed_count} objects with {prefs.highpoly_suffix}, "
+                                     f"{len(conflicts)} skipped (name already in use)")
+        else:
+            self.report({'INFO'}, f"Renamed {renamed_count} objects with {prefs.highpoly_suffix}")
         return {'FINISHED'}
     
 class OBJECT_OT_batch_rename(bpy.types.Operator):
@@ -246,15 +344,14 @@ def execute(self, context):
             return {'CANCELLED'}
         
         base_name = self.new_name.strip()
-        renamed_count = 0
         
-        for i, obj in enumerate(selected_objects, 1):
-            # Formato: nome_01, nome_02, ecc.
-            new_name = f"{base_name}_{i:02d}"
-            obj.name = new_name
-            renamed_count += 1
+        renamed_count, conflicts = batch_rename_objects(selected_objects, base_name)
 
-        self.report({'INFO'}, f"Renamed {renamed_count} objects with '{base_name}_XX'")
+        if conflicts:
+            self.report({'WARNING'}, f"Renamed {renamed_count} objects with '{base_name}_XX', "
+                                     f"{len(conflicts)} skipped (name already in use)")
+        else:
+            self.report({'INFO'}, f"Renamed {renamed_count} objects with '{base_name}_XX'")
         return {'FINISHED'}
     
     def invoke(self, context, event):
@@ -264,12 +361,14 @@ def invoke(self, context, event):
 
 def renamer_lowpoly_register():
     bpy.utils.register_class(OBJECT_OT_auto_match_lp_hp)
+    bpy.utils.register_class(OBJECT_OT_group_hp_to_lp)
     bpy.utils.register_class(OBJECT_OT_add_lp_suffix)
     bpy.utils.register_class(OBJECT_OT_add_hp_suffix)
     bpy.utils.register_class(OBJECT_OT_batch_rename)
 
 def renamer_lowpoly_unregister():
     bpy.utils.unregister_class(OBJECT_OT_auto_match_lp_hp)
+    bpy.utils.unregister_class(OBJECT_OT_group_hp_to_lp)
     bpy.utils.unregister_class(OBJECT_OT_add_lp_suffix)
     bpy.utils.unregister_class(OBJECT_OT_add_hp_suffix)
     bpy.utils.unregister_class(OBJECT_OT_batch_rename)
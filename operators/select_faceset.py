@@ -1,5 +1,89 @@
 import bpy
+import bmesh
+import numpy as np
 from bpy.types import Operator
+from bpy_extras import view3d_utils
+from mathutils.bvhtree import BVHTree
+from .face_sets import FACE_SET_ATTRIBUTE, get_face_set_index
+from .mesh_cache import get_cached, mark_selection_update
+
+
+# Facce nascoste che un raggio di pick può attraversare prima di arrendersi
+MAX_HIDDEN_HITS = 64
+
+
+def selected_face_sets(bm):
+    """Id dei Face Set delle facce selezionate della BMesh di Edit Mode,
+    None se la mesh non ha Face Set.
+
+    Legge il layer direttamente dalla BMesh: niente update_from_editmode,
+    che copierebbe tutta la mesh nei dati dell'oggetto.
+    """
+    layer = bm.faces.layers.int.get(FACE_SET_ATTRIBUTE)
+    if layer is None:
+        return None
+    return np.unique(np.fromiter((face[layer] for face in bm.faces if face.select), dtype=np.int32))
+
+def get_edit_bvh(obj, bm):
+    """BVH delle facce della mesh in Edit Mode, in spazio locale.
+
+    In cache per mesh e ricostruito solo dopo una modifica della geometria
+    (generazione della mesh_cache): i pick successivi lo riusano. Gli
+    indici trovati sono quelli delle facce della BMesh.
+    """
+    return get_cached(obj.data, "face_set_pick_bvh", lambda mesh: BVHTree.FromBMesh(bm))
+
+def pick_face(context, objects, coord):
+    """Faccia visibile sotto la coordinata della region, come (oggetto, BMFace).
+
+    Lancia un raggio dalla vista nel BVH in cache di ogni oggetto e tiene
+    il più vicino. Restituisce (None, None) se non colpisce nulla.
+    """
+    region, rv3d = context.region, context.region_data
+    origin = view3d_utils.region_2d_to_origin_3d(region, rv3d, coord)
+    direction = view3d_utils.region_2d_to_vector_3d(region, rv3d, coord)
+
+    best = (None, None)
+    best_distance = float('inf')
+    for obj in objects:
+        bm = bmesh.from_edit_mesh(obj.data)
+        bm.faces.ensure_lookup_table()
+        bvh = get_edit_bvh(obj, bm)
+
+        matrix_inv = obj.matrix_world.inverted()
+        ray_origin = matrix_inv @ origin
+        ray_direction = (matrix_inv.to_3x3() @ direction).normalized()
+
+        for _ in range(MAX_HIDDEN_HITS):
+            location, _normal, index, _distance = bvh.ray_cast(ray_origin, ray_direction)
+            if index is None:
+                break
+            face = bm.faces[index]
+            if not face.hide:
+                distance = (obj.matrix_world @ location - origin).length
+                if distance < best_distance:
+                    best, best_distance = (obj, face), distance
+                break
+            # Faccia nascosta: il raggio riparte appena oltre
+            ray_origin = location + ray_direction * 1e-5
+    return best
+
+def set_faces_selected(faces, select):
+    """Seleziona o deseleziona le facce indicate della BMesh di Edit Mode.
+
+    Si toccano solo queste facce. Deselezionare una faccia può deselezionare
+    vertici ed edge condivisi con facce che restano selezionate: quei vicini
+    vengono riselezionati.
+    """
+    for face in faces:
+        face.select_set(select)
+
+    if not select:
+        neighbours = {linked for face in faces for vert in face.verts
+                      for linked in vert.link_faces if linked.select}
+        for face in neighbours:
+            face.select_set(True)
+
 
 class MESH_OT_select_linked_face_set(Operator):
     """Select all faces in the same Face Set"""
@@ -17,6 +101,10 @@ class MESH_OT_select_linked_face_set(Operator):
         default='SELECT'
     )
 
+    # Face Set scelto da invoke, riusato quando l'operatore viene rifatto (redo)
+    picked_object: bpy.props.StringProperty(options={'HIDDEN', 'SKIP_SAVE'})
+    picked_face_set: bpy.props.IntProperty(options={'HIDDEN', 'SKIP_SAVE'})
+
     @classmethod
     def poll(cls, context):
         return (context.mode == 'EDIT_MESH' and 
@@ -24,88 +112,78 @@ def poll(cls, context):
                 context.active_object.type == 'MESH')
 
     def invoke(self, context, event):
-        obj = context.active_object
-        mesh = obj.data
+        if context.region_data is None:
+            return self.execute(context)
         
-        # Check if Face Sets exist
-        if not mesh.attributes.get('.sculpt_face_set'):
+        objects = [obj for obj in context.objects_in_mode_unique_data
+                   if obj.type == 'MESH' and obj.data.attributes.get(FACE_SET_ATTRIBUTE)]
+        if not objects:
             self.report({'WARNING'}, "No Face Sets found on this object")
             return {'CANCELLED'}
         
-        # Store current selection for ADD and SUBTRACT modes
-        if self.mode in ('ADD', 'SUBTRACT'):
-            bpy.ops.object.mode_set(mode='OBJECT')
-            stored_selection = [poly.select for poly in mesh.polygons]
-            bpy.ops.object.mode_set(mode='EDIT')
-        
-        # Select face under mouse cursor
-        bpy.ops.mesh.select_all(action='DESELECT')
-        bpy.ops.view3d.select(
-            extend=False,
-            location=(event.mouse_region_x, event.mouse_region_y)
-        )
-        
-        # Execute selection logic
-        result = self.execute(context)
-        
-        # Restore and modify selection for ADD and SUBTRACT modes
-        if result == {'FINISHED'} and self.mode in ('ADD', 'SUBTRACT'):
-            bpy.ops.object.mode_set(mode='OBJECT')
-            face_set_layer = mesh.attributes['.sculpt_face_set'].data
-            
-            # Find Face Set IDs from picked face
-            picked_face_set_ids = set()
-            for poly in mesh.polygons:
-                if poly.select:
-                    picked_face_set_ids.add(face_set_layer[poly.index].value)
-            
-            # Apply mode
-            for i, poly in enumerate(mesh.polygons):
-                if face_set_layer[poly.index].value in picked_face_set_ids:
-                    if self.mode == 'ADD':
-                        poly.select = True
-                    elif self.mode == 'SUBTRACT':
-                        poly.select = False
-                else:
-                    poly.select = stored_selection[i]
-            
-            bpy.ops.object.mode_set(mode='EDIT')
+        # Ray cast sotto il cursore: la selezione non viene toccata
+        obj, face = pick_face(context, objects, (event.mouse_region_x, event.mouse_region_y))
+        if face is None:
+            self.report({'WARNING'}, "No face under the cursor")
+            return {'CANCELLED'}
         
-        return result
+        bm = bmesh.from_edit_mesh(obj.data)
+        layer = bm.faces.layers.int.get(FACE_SET_ATTRIBUTE)
+        self.picked_object = obj.name
+        self.picked_face_set = face[layer]
+        return self.execute(context)
 
     def execute(self, context):
+        if self.picked_object:
+            obj = context.scene.objects.get(self.picked_object)
+            if obj is None or obj.mode != 'EDIT':
+                return {'CANCELLED'}
+            face_set_ids = [self.picked_face_set]
+            if self.mode == 'SELECT':
+                bpy.ops.mesh.select_all(action='DESELECT')
+            return self.apply(obj, face_set_ids)
+        
         obj = context.active_object
-        mesh = obj.data
         
         # Check if Face Sets exist
-        if not mesh.attributes.get('.sculpt_face_set'):
+        if not obj.data.attributes.get(FACE_SET_ATTRIBUTE):
             self.report({'WARNING'}, "No Face Sets found on this object")
             return {'CANCELLED'}
         
-        # Switch to Object Mode temporarily
-        bpy.ops.object.mode_set(mode='OBJECT')
-        
-        face_set_layer = mesh.attributes['.sculpt_face_set'].data
-        
-        # Find all selected faces and their Face Set IDs
-        selected_face_set_ids = set()
-        for poly in mesh.polygons:
-            if poly.select:
-                selected_face_set_ids.add(face_set_layer[poly.index].value)
-        
-        if not selected_face_set_ids:
+        # Face Set delle facce selezionate, letti dalla BMesh
+        face_set_ids = selected_face_sets(bmesh.from_edit_mesh(obj.data))
+        if face_set_ids is None or not len(face_set_ids):
             self.report({'WARNING'}, "No face selected")
-            bpy.ops.object.mode_set(mode='EDIT')
             return {'CANCELLED'}
         
-        # Select all faces with the same Face Set IDs
-        if self.mode == 'SELECT':
-            for poly in mesh.polygons:
-                if face_set_layer[poly.index].value in selected_face_set_ids:
-                    poly.select = True
+        return self.apply(obj, face_set_ids)
+
+    def apply(self, obj, face_set_ids):
+        """Seleziona, aggiunge o sottrae tutte le facce dei Face Set indicati.
+
+        Le facce arrivano dall'indice dei Face Set in cache: si visitano
+        solo quelle dei Face Set richiesti.
+        """
+        bm = bmesh.from_edit_mesh(obj.data)
+        index = get_face_set_index(obj, bm)
+        if index is None:
+            self.report({'WARNING'}, "No Face Sets found on this object")
+            return {'CANCELLED'}
+        
+        bm.faces.ensure_lookup_table()
+        faces = bm.faces
+        members = [faces[i] for i in index.faces_of(face_set_ids).tolist()]
+        
+        # Si toccano solo le facce la cui selezione cambia davvero
+        if self.mode == 'SUBTRACT':
+            changed = [face for face in members if face.select]
+        else:
+            changed = [face for face in members if not face.select and not face.hide]
         
-        # Return to Edit Mode
-        bpy.ops.object.mode_set(mode='EDIT')
+        if changed:
+            set_faces_selected(changed, self.mode != 'SUBTRACT')
+            mark_selection_update(obj.data)
+            bmesh.update_edit_mesh(obj.data, loop_triangles=False, destructive=False)
         
         self.report({'INFO'}, "Face Set selected")
         return {'FINISHED'}
@@ -1,5 +1,7 @@
 import bpy
 
+from .rename_transaction import rename_objects
+
 class RENAME_OT_SwapObjectNames(bpy.types.Operator):
     """Swap the names of two meshes selected in the Outliner."""
     bl_idname = "rename.swap_object_names"
@@ -16,10 +18,8 @@ def execute(self, context):
         name1 = selected_objects[0].name
         name2 = selected_objects[1].name
         
-        # Scambio dei nomi
-        selected_objects[0].name = "TEMP_SWAP_NAME_12345"
-        selected_objects[1].name = name1
-        selected_objects[0].name = name2
+        # Scambio dei nomi (un ciclo di due rinomine, risolto con un nome temporaneo)
+        rename_objects([(selected_objects[0], name2), (selected_objects[1], name1)])
         
         self.report({'INFO'}, "Names successfully swapped!")
         return {'FINISHED'}
@@ -1,5 +1,6 @@
 import bpy
 from bpy.types import Panel
+from ..operators.attributes_manager import PANEL_VALUE_PROPS
 
 # Pannello principale
 class MANUTOOLS_PT_attributes_manager(Panel):
@@ -58,10 +59,39 @@ def draw(self, context):
         sub.operator("mesh.attribute_select", text="Select")
         sub.operator("mesh.attribute_deselect", text="Deselect")
         
+        row = layout.row(align=True)
+        row.operator("mesh.attribute_select_value", text="Select by Value", icon='RESTRICT_SELECT_OFF')
+        row.operator("mesh.attribute_expression", text="Compute", icon='CONSOLE')
+        
+        row = layout.row(align=True)
+        row.operator("mesh.attribute_export", text="Export", icon='EXPORT')
+        row.operator("mesh.attribute_import", text="Import", icon='IMPORT')
+        row.operator("mesh.attribute_transfer", text="Transfer", icon='UV_SYNC_SELECT')
+        
         layout.separator()
         
-        # Campo Weight
+        # Valore da assegnare, in base al tipo dell'attributo attivo
         col = layout.column(align=True)
         col.use_property_split = True
         col.use_property_decorate = False
-        col.prop(props, "weight", slider=True)
\ No newline at end of file
+        
+        attr = None
+        if 0 <= mesh.attributes.active_index < len(mesh.attributes):
+            attr = mesh.attributes[mesh.attributes.active_index]
+        
+        value_prop = PANEL_VALUE_PROPS.get(attr.data_type, "weight") if attr else "weight"
+        if value_prop == "weight":
+            col.prop(props, "weight", slider=True)
+        else:
+            col.prop(props, value_prop)
+        
+        # Falloff (solo attributi di vertice)
+        if attr and attr.domain == 'POINT':
+            col.separator()
+            col.prop(props, "falloff")
+            if props.falloff == 'LINEAR':
+                row = col.row(align=True)
+                row.prop(props, "falloff_axis", expand=True)
+                col.prop(props, "falloff_invert")
+            elif props.falloff == 'CURSOR':
+                col.prop(props, "falloff_radius")
\ No newline at end of file
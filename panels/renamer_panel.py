@@ -32,6 +32,14 @@ def draw(self, context):
         box = layout.box()
         box.label(text="Auto Matching:")
         box.operator("object.auto_match_lp_hp")
+        op = box.operator("object.auto_match_lp_hp", text="Auto Match LP-HP (Optimal)")
+        op.assignment = 'OPTIMAL'
+        op = box.operator("object.auto_match_lp_hp", text="Auto Match LP-HP (Exploded)")
+        op.assignment = 'OPTIMAL'
+        op.method = 'SHAPE'
+        op = box.operator("object.auto_match_lp_hp", text="Auto Match LP-HP (Incremental)")
+        op.incremental = True
+        box.operator("object.group_hp_to_lp")
         
         # Quick info
         layout.separator()
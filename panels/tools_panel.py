@@ -38,6 +38,20 @@ def draw(self, context):
         col = box.column(align=True)
         col.operator("manutools.add_bevel_modifier", icon='MOD_BEVEL')
 
+        # Sezione Face Sets (generazione su tutte le mesh selezionate)
+        box = layout.box()
+        row = box.row()
+        row.label(text="Face Sets", icon="FACESEL")
+
+        col = box.column(align=True)
+        col.operator_menu_enum("mesh.face_sets_generate", "source", text="Generate Face Sets", icon='ADD')
+        if context.mode == 'EDIT_MESH':
+            row = col.row(align=True)
+            row.operator("mesh.face_set_edit", text="Grow", icon='ADD').mode = 'GROW'
+            row.operator("mesh.face_set_edit", text="Shrink", icon='REMOVE').mode = 'SHRINK'
+            col.operator("mesh.face_set_edit", text="Select Boundary", icon='EDGESEL').mode = 'BOUNDARY'
+            col.operator("mesh.face_set_edit", text="Merge Small", icon='AUTOMERGE_OFF').mode = 'MERGE_SMALL'
+
         # Mostra solo in modalità Edit
         if context.mode == 'EDIT_MESH':
 
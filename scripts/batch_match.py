@@ -0,0 +1,173 @@
+"""Run the ManuTools LP/HP matcher on every .blend file of a directory.
+
+Each file is processed by its own background Blender process running
+match_lp_hp.py; up to --jobs processes run at the same time. A JSON
+summary is written for every file, plus batch_summary.json for the run.
+
+Usage:
+    python scripts/batch_match.py ASSETS_DIR --blender /path/to/blender
+        [--jobs N] [--recursive] [--summary-dir DIR] [--output-dir DIR]
+        [--collections NAME ...] [--assignment GREEDY|OPTIMAL] [--method DISTANCE|SHAPE]
+        [--lp-suffix S] [--hp-suffix S] [--max-distance D] [--no-rename]
+
+Without --output-dir the files are saved in place. Blender is started with
+--factory-startup, so the suffixes default to _lp/_hp unless given.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+
+MATCH_SCRIPT = Path(__file__).resolve().parent / "match_lp_hp.py"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Batch LP/HP matching over .blend files")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--blender", default=shutil.which("blender") or "blender")
+    parser.add_argument("--jobs", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--recursive", action="store_true")
+    parser.add_argument("--summary-dir", type=Path, default=None)
+    parser.add_argument("--output-dir", type=Path, default=None)
+    parser.add_argument("--collections", nargs="+", default=None)
+    parser.add_argument("--assignment", choices=("GREEDY", "OPTIMAL"), default="OPTIMAL")
+    parser.add_argument("--method", choices=("DISTANCE", "SHAPE"), default="DISTANCE")
+    parser.add_argument("--lp-suffix", default=None)
+    parser.add_argument("--hp-suffix", default=None)
+    parser.add_argument("--max-distance", type=float, default=None)
+    parser.add_argument("--no-rename", action="store_true")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds per file")
+    return parser.parse_args(argv)
+
+
+def find_blend_files(directory, recursive):
+    pattern = "**/*.blend" if recursive else "*.blend"
+    return sorted(path for path in directory.glob(pattern) if path.is_file())
+
+
+def build_command(args, blend_file, summary_file):
+    command = [
+        args.blender, "-b", str(blend_file),
+        "--factory-startup",
+        "--python-exit-code", "1",
+        "--python", str(MATCH_SCRIPT),
+        "--",
+        "--assignment", args.assignment,
+        "--method", args.method,
+        "--summary", str(summary_file),
+    ]
+    if args.collections:
+        command += ["--collections", *args.collections]
+    if args.lp_suffix:
+        command += ["--lp-suffix", args.lp_suffix]
+    if args.hp_suffix:
+        command += ["--hp-suffix", args.hp_suffix]
+    if args.max_distance is not None:
+        command += ["--max-distance", str(args.max_distance)]
+    if args.no_rename:
+        command.append("--no-rename")
+
+    if args.output_dir:
+        relative = blend_file.relative_to(args.directory)
+        output = args.output_dir / relative
+        output.parent.mkdir(parents=True, exist_ok=True)
+        command += ["--output", str(output)]
+    else:
+        command.append("--save")
+
+    return command
+
+
+def process_file(args, blend_file):
+    if args.summary_dir:
+        summary_file = args.summary_dir / blend_file.relative_to(args.directory).with_suffix(".match.json")
+        summary_file.parent.mkdir(parents=True, exist_ok=True)
+    else:
+        summary_file = blend_file.with_suffix(".match.json")
+    log_file = summary_file.with_suffix(".log")
+
+    # A summary left by a previous run must not be read as the result of this one
+    summary_file.unlink(missing_ok=True)
+
+    start = time.perf_counter()
+    with open(log_file, "w", encoding="utf-8") as log:
+        try:
+            completed = subprocess.run(
+                build_command(args, blend_file, summary_file),
+                stdout=log, stderr=subprocess.STDOUT, timeout=args.timeout,
+            )
+            returncode = completed.returncode
+        except subprocess.TimeoutExpired:
+            returncode = None
+
+    result = {
+        "file": str(blend_file),
+        "summary": str(summary_file),
+        "log": str(log_file),
+        "returncode": returncode,
+        "elapsed": time.perf_counter() - start,
+        "success": False,
+    }
+    if summary_file.exists():
+        with open(summary_file, encoding="utf-8") as f:
+            file_summary = json.load(f)
+        result["success"] = returncode == 0 and file_summary.get("success", False)
+        result["matches"] = len(file_summary.get("matches", []))
+        result["unmatched"] = len(file_summary.get("unmatched", []))
+        if "error" in file_summary:
+            result["error"] = file_summary["error"]
+    elif returncode is None:
+        result["error"] = "timeout"
+    else:
+        result["error"] = "no summary written, see log"
+
+    return result
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    files = find_blend_files(args.directory, args.recursive)
+    if not files:
+        print(f"No .blend files found in {args.directory}")
+        return 1
+
+    if args.summary_dir:
+        args.summary_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"Matching {len(files)} files with {args.jobs} Blender processes")
+    start = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(process_file, args, path): path for path in files}
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            status = "OK" if result["success"] else f"FAILED ({result.get('error', 'see log')})"
+            print(f"  [{len(results)}/{len(files)}] {futures[future].name}: {status}")
+
+    results.sort(key=lambda r: r["file"])
+    failed = [r for r in results if not r["success"]]
+    batch_summary = {
+        "directory": str(args.directory),
+        "files": len(results),
+        "failed": len(failed),
+        "elapsed": time.perf_counter() - start,
+        "results": results,
+    }
+    summary_path = (args.summary_dir or args.directory) / "batch_summary.json"
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(batch_summary, f, indent=2)
+
+    print(f"Done: {len(results) - len(failed)} succeeded, {len(failed)} failed. Summary: {summary_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+"""Benchmark the ManuTools renamer and LP/HP matcher on synthetic scenes.
+
+Scenes are generated from a seeded RNG, so two runs with the same options
+build the same objects. Every scene holds N LP/HP pairs laid out on a grid:
+the HP objects are jittered by --position-noise and a --name-noise fraction
+of them gets a random name, so both the name pass and the geometric pass of
+the matcher are exercised.
+
+Usage:
+    blender -b --factory-startup --python-exit-code 1 \\
+        --python scripts/benchmark_renamer.py -- [options]
+
+Options (after the "--"):
+    --sizes N [N ...]          Number of LP/HP pairs per scene (default: 100 1000 5000 20000)
+    --operations OP [OP ...]   Subset of the benchmarked operations (default: all)
+    --seed INT                 RNG seed (default: 0)
+    --name-noise FLOAT         Fraction of HP objects with a random name (default: 0.5)
+    --position-noise FLOAT     Standard deviation of the HP offset (default: 0.1)
+    --unique-meshes            Give every object its own mesh instead of sharing two
+    --repeat INT               Runs per size, the fastest one is kept (default: 1)
+    --output PATH              Write the results as JSON
+    --compare PATH             Compare against a previous JSON output
+    --threshold FLOAT          Allowed slowdown before a regression is reported (default: 0.2)
+    --min-time FLOAT           Ignore regressions on timings below this many seconds (default: 0.01)
+
+Timings come from a pass without tracemalloc; peak memory from a second
+pass over the same seeded scene with tracemalloc running.
+
+With --compare the script exits with an error when an operation is slower
+than the baseline by more than --threshold; run Blender with
+--python-exit-code 1 to turn that into a non-zero exit status.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import bmesh
+import bpy
+
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from match_lp_hp import load_addon  # noqa: E402
+
+
+LP_SUFFIX = "_lp"
+HP_SUFFIX = "_hp"
+MAX_DISTANCE = 5.0
+GRID_SPACING = 4.0 * MAX_DISTANCE
+
+OPERATIONS = (
+    "auto_match_greedy",
+    "auto_match_optimal",
+    "auto_match_shape",
+    "auto_match_incremental_first",
+    "auto_match_incremental",
+    "auto_match_rename",
+    "add_lp_suffix",
+    "add_hp_suffix",
+    "batch_rename",
+    "rename_cycle",
+)
+
+
+def parse_args(argv):
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+
+    parser = argparse.ArgumentParser(prog="benchmark_renamer.py", description="Renamer/matcher benchmark")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 5000, 20000])
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--name-noise", type=float, default=0.5)
+    parser.add_argument("--position-noise", type=float, default=0.1)
+    parser.add_argument("--unique-meshes", action="store_true")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--min-time", type=float, default=0.01)
+    return parser.parse_args(argv)
+
+
+# =============================================================================
+# SCENE
+# =============================================================================
+
+def clear_scene():
+    bpy.data.batch_remove(list(bpy.data.objects) + list(bpy.data.meshes))
+
+
+def build_meshes():
+    """LP: a plain cube. HP: the same cube subdivided, so it has more vertices"""
+    meshes = []
+    for name, cuts in (("bench_lp", 0), ("bench_hp", 6)):
+        bm = bmesh.new()
+        bmesh.ops.create_cube(bm, size=1.0)
+        if cuts:
+            bmesh.ops.subdivide_edges(bm, edges=bm.edges[:], cuts=cuts, use_grid_fill=True)
+        mesh = bpy.data.meshes.new(name)
+        bm.to_mesh(mesh)
+        bm.free()
+        meshes.append(mesh)
+    return meshes
+
+
+def generate_scene(size, rng, name_noise, position_noise, unique_meshes):
+    """Create size LP/HP pairs, returns (lp_objects, hp_objects) in creation order"""
+    clear_scene()
+    lp_mesh, hp_mesh = build_meshes()
+    collection = bpy.context.scene.collection
+
+    side = max(1, int(size ** 0.5 + 0.999))
+    lp_objects = []
+    hp_data = []
+    for i in range(size):
+        x, y = (i % side) * GRID_SPACING, (i // side) * GRID_SPACING
+        scale = rng.uniform(0.5, 2.0)
+
+        lp = bpy.data.objects.new(f"part_{i:05d}{LP_SUFFIX}", lp_mesh.copy() if unique_meshes else lp_mesh)
+        lp.location = (x, y, 0.0)
+        lp.scale = (scale, scale, scale)
+        lp_objects.append(lp)
+
+        if rng.random() < name_noise:
+            hp_name = f"mesh_{rng.getrandbits(32):08x}"
+        else:
+            hp_name = f"part_{i:05d}{HP_SUFFIX}"
+        offset = [rng.gauss(0.0, position_noise) for _axis in range(3)]
+        hp_data.append((hp_name, (x + offset[0], y + offset[1], offset[2]), scale))
+
+    # HP objects are created in random order, like in an imported scene
+    rng.shuffle(hp_data)
+    hp_objects = []
+    for hp_name, location, scale in hp_data:
+        hp = bpy.data.objects.new(hp_name, hp_mesh.copy() if unique_meshes else hp_mesh)
+        hp.location = location
+        hp.scale = (scale, scale, scale)
+        hp_objects.append(hp)
+
+    for obj in lp_objects + hp_objects:
+        collection.objects.link(obj)
+    bpy.context.view_layer.update()
+    return lp_objects, hp_objects
+
+
+# =============================================================================
+# OPERATIONS
+# =============================================================================
+
+def build_operations(renamer, rng):
+    """Operation name -> (setup, run), both called with (lp_objects, hp_objects).
+
+    Only run is timed. The order of OPERATIONS matters: the last ones rename objects.
+    """
+    prefs = SimpleNamespace(lowpoly_suffix=LP_SUFFIX, highpoly_suffix=HP_SUFFIX)
+
+    def auto_match(lp_objects, hp_objects, **kwargs):
+        kwargs.setdefault("rename", False)
+        renamer.auto_match_lp_hp(
+            objects=lp_objects + hp_objects,
+            lp_suffix=LP_SUFFIX, hp_suffix=HP_SUFFIX, max_distance=MAX_DISTANCE,
+            **kwargs,
+        )
+
+    def nudge(lp_objects, hp_objects):
+        # Move a few HP objects, like after a small edit of the scene
+        for hp in rng.sample(hp_objects, min(3, len(hp_objects))):
+            hp.location.z += 0.01
+        bpy.context.view_layer.update()
+
+    def rename_cycle(lp_objects, hp_objects):
+        # Every object takes the name of the next one: a single cycle of N names
+        objects = lp_objects + hp_objects
+        names = [obj.name for obj in objects]
+        renamer.rename_objects(zip(objects, names[1:] + names[:1]))
+
+    return {
+        "auto_match_greedy": (None, lambda lp, hp: auto_match(lp, hp, assignment='GREEDY')),
+        "auto_match_optimal": (None, lambda lp, hp: auto_match(lp, hp, assignment='OPTIMAL')),
+        "auto_match_shape": (None, lambda lp, hp: auto_match(lp, hp, assignment='OPTIMAL', method='SHAPE')),
+        "auto_match_incremental_first": (None, lambda lp, hp: auto_match(lp, hp, incremental=True)),
+        "auto_match_incremental": (nudge, lambda lp, hp: auto_match(lp, hp, incremental=True)),
+        "auto_match_rename": (None, lambda lp, hp: auto_match(lp, hp, assignment='OPTIMAL', rename=True)),
+        "add_lp_suffix": (None, lambda lp, hp: renamer.add_suffix_to_objects(lp, LP_SUFFIX, prefs)),
+        "add_hp_suffix": (None, lambda lp, hp: renamer.add_suffix_to_objects(hp, HP_SUFFIX, prefs)),
+        "batch_rename": (None, lambda lp, hp: renamer.batch_rename_objects(lp + hp, "bench")),
+        "rename_cycle": (None, rename_cycle),
+    }
+
+
+def time_call(function, *args):
+    """Wall time of one call, without tracemalloc (it slows every allocation down)"""
+    # The matching report (one line per pair) is not part of the measure
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        function(*args)
+        return time.perf_counter() - start
+
+
+def peak_memory(function, *args):
+    """Peak Python memory (tracemalloc) of one call"""
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            function(*args)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_operations(args, renamer, size, run, measure):
+    """Generate the scene of this run and measure every operation on it.
+
+    The same seed gives the same scene and the same edits, so the timed pass
+    and the memory pass see the same states. Returns ({operation: value},
+    scene generation time).
+    """
+    rng = random.Random(f"{args.seed}-{size}-{run}")
+    start = time.perf_counter()
+    lp_objects, hp_objects = generate_scene(
+        size, rng, args.name_noise, args.position_noise, args.unique_meshes,
+    )
+    generate_time = time.perf_counter() - start
+
+    operations = build_operations(renamer, rng)
+    values = {}
+    for name in OPERATIONS:
+        if name not in args.operations:
+            continue
+        setup, function = operations[name]
+        if setup is not None:
+            setup(lp_objects, hp_objects)
+        values[name] = measure(function, lp_objects, hp_objects)
+    return values, generate_time
+
+
+def run_size(args, renamer, size):
+    best = {}
+    for run in range(args.repeat):
+        # Timing and memory come from two separate passes over the same scene
+        times, generate_time = run_operations(args, renamer, size, run, time_call)
+        peaks, _generate_time = run_operations(args, renamer, size, run, peak_memory)
+        times["generate_scene"] = generate_time
+        peaks["generate_scene"] = 0
+
+        for name, elapsed in times.items():
+            if name not in best or elapsed < best[name]["time"]:
+                best[name] = {"time": elapsed, "peak_memory": peaks[name]}
+
+    clear_scene()
+    return best
+
+
+# =============================================================================
+# BASELINE
+# =============================================================================
+
+def compare_results(results, baseline, threshold, min_time):
+    """Print the comparison with the baseline, returns the regressions"""
+    regressions = []
+    print(f"\n{'size':>7}  {'operation':<30} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for size, operations in results.items():
+        base_operations = baseline.get(size)
+        if not base_operations:
+            continue
+        for name, current in operations.items():
+            base = base_operations.get(name)
+            if base is None:
+                continue
+            ratio = current["time"] / base["time"] if base["time"] > 0 else float("inf")
+            regressed = ratio > 1.0 + threshold and current["time"] - base["time"] > min_time
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{size:>7}  {name:<30} {base['time']:>10.4f} {current['time']:>10.4f} {ratio:>7.2f}{flag}")
+            if regressed:
+                regressions.append((size, name, ratio))
+    return regressions
+
+
+def main():
+    args = parse_args(sys.argv)
+    addon = load_addon()
+    operators = addon.operators
+
+    # The cache handlers and the scene property of incremental matching are needed
+    operators.mesh_cache.mesh_cache_register()
+    operators.lp_hp_matching.lp_hp_matching_register()
+
+    results = {}
+    try:
+        for size in args.sizes:
+            print(f"Benchmarking {size} LP/HP pairs...")
+            results[str(size)] = run_size(args, operators.renamer_lowpoly, size)
+            for name, timing in results[str(size)].items():
+                print(f"  {name:<30} {timing['time']:>9.4f} s  {timing['peak_memory'] / 2**20:>8.1f} MiB")
+    finally:
+        operators.lp_hp_matching.lp_hp_matching_unregister()
+        operators.mesh_cache.mesh_cache_unregister()
+
+    report = {
+        "blender": bpy.app.version_string,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "seed": args.seed,
+            "name_noise": args.name_noise,
+            "position_noise": args.position_noise,
+            "unique_meshes": args.unique_meshes,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline["results"], args.threshold, args.min_time)
+        if regressions:
+            print(f"\n{len(regressions)} regressions above {args.threshold:.0%}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
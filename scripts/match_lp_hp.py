@@ -0,0 +1,134 @@
+"""Run the ManuTools LP/HP matcher on a .blend file without the UI.
+
+Usage:
+    blender -b file.blend --python scripts/match_lp_hp.py -- [options]
+
+Options (after the "--"):
+    --collections NAME [NAME ...]   Match only the meshes in these collections
+                                    (default: every mesh in the scene)
+    --assignment GREEDY|OPTIMAL     Assignment mode (default: OPTIMAL)
+    --method DISTANCE|SHAPE         Match by position or by shape descriptors,
+                                    for exploded layouts (default: DISTANCE)
+    --lp-suffix / --hp-suffix       Naming suffixes (default: addon preferences or _lp/_hp)
+    --max-distance FLOAT            Maximum LP/HP distance (default: addon preferences or 5.0)
+    --no-rename                     Only report the matches, don't rename HP objects
+    --save                          Save the file in place after matching
+    --output PATH                   Save the result to a different .blend file
+    --summary PATH                  Write a JSON summary of the run
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+
+import bpy
+
+
+ADDON_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_addon():
+    """Import the addon package from this repository without registering it"""
+    name = "_manutools_batch"
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.spec_from_file_location(
+        name,
+        os.path.join(ADDON_ROOT, "__init__.py"),
+        submodule_search_locations=[ADDON_ROOT],
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_args(argv):
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+
+    parser = argparse.ArgumentParser(prog="match_lp_hp.py", description="Headless LP/HP matching")
+    parser.add_argument("--collections", nargs="+", default=None)
+    parser.add_argument("--assignment", choices=("GREEDY", "OPTIMAL"), default="OPTIMAL")
+    parser.add_argument("--method", choices=("DISTANCE", "SHAPE"), default="DISTANCE")
+    parser.add_argument("--lp-suffix", default=None)
+    parser.add_argument("--hp-suffix", default=None)
+    parser.add_argument("--max-distance", type=float, default=None)
+    parser.add_argument("--no-rename", action="store_true")
+    parser.add_argument("--save", action="store_true")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--summary", default=None)
+    return parser.parse_args(argv)
+
+
+def collect_objects(collection_names):
+    """Meshes of the chosen collections (children included), or of the whole scene"""
+    if not collection_names:
+        return [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
+
+    objects = {}
+    for name in collection_names:
+        collection = bpy.data.collections.get(name)
+        if collection is None:
+            raise ValueError(f"Collection not found: {name}")
+        for obj in collection.all_objects:
+            if obj.type == 'MESH':
+                objects[obj.name] = obj
+    return list(objects.values())
+
+
+def main():
+    args = parse_args(sys.argv)
+    addon = load_addon()
+    renamer = addon.operators.renamer_lowpoly
+
+    summary = {
+        "file": bpy.data.filepath,
+        "assignment": args.assignment,
+        "method": args.method,
+        "collections": args.collections,
+        "success": False,
+    }
+    start = time.perf_counter()
+
+    try:
+        objects = collect_objects(args.collections)
+        matches, unmatched = renamer.auto_match_lp_hp(
+            assignment=args.assignment,
+            method=args.method,
+            objects=objects,
+            lp_suffix=args.lp_suffix,
+            hp_suffix=args.hp_suffix,
+            max_distance=args.max_distance,
+            rename=not args.no_rename,
+        )
+
+        summary.update({
+            "objects": len(objects),
+            "matches": [[lp.name, hp.name] for lp, hp in matches],
+            "unmatched": [lp.name for lp in unmatched],
+        })
+
+        if args.output:
+            bpy.ops.wm.save_as_mainfile(filepath=os.path.abspath(args.output), copy=True)
+            summary["saved"] = os.path.abspath(args.output)
+        elif args.save:
+            bpy.ops.wm.save_mainfile()
+            summary["saved"] = bpy.data.filepath
+
+        summary["success"] = True
+    except Exception as e:
+        summary["error"] = str(e)
+        raise
+    finally:
+        summary["elapsed"] = time.perf_counter() - start
+        if args.summary:
+            with open(args.summary, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()